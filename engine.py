@@ -1,11 +1,22 @@
 #!/usr/bin/env python3
+import itertools
 import time
 import math
+import multiprocessing
+import multiprocessing.synchronize
+import os
+import queue
+import random
+import sys
+import threading
+import weakref
+
+from array import array
+from multiprocessing import shared_memory
 
-from chess import Move
 import teo_chess
 import teo_chess.polyglot
-from typing import Optional, Tuple, List, Dict, NamedTuple
+from typing import Callable, Iterator, Optional, Tuple, List, Dict, NamedTuple, Union
 from collections import defaultdict
 
 # ——————————————————————————————————————————————————————————
@@ -93,6 +104,18 @@ TABLES: Dict[int,List[int]] = {
     teo_chess.QUEEN:  QUEEN_TABLE,
 }
 
+# Acumulator incremental (material + PST) pe tablă, din perspectiva albului:
+# tabelele de mai sus sunt scrise pentru negru, deci albul folosește pătratul oglindit.
+def _white_pov(p: int, king_table: List[int]) -> List[int]:
+    tbl = TABLES.get(p, king_table)
+    return [PIECE_VALUES[p] + tbl[teo_chess.square_mirror(sq)] for sq in teo_chess.SQUARES]
+
+PSQT = teo_chess.PieceSquareTables(
+    mg={p: _white_pov(p, KING_MG) for p in PIECE_VALUES},
+    eg={p: _white_pov(p, KING_EG) for p in PIECE_VALUES},
+    phase=PIECE_VALUES,
+)
+
 # ——————————————————————————————————————————————————————————
 #                       TRANSPOSITION TABLE
 # ——————————————————————————————————————————————————————————
@@ -100,62 +123,251 @@ TABLES: Dict[int,List[int]] = {
 class TTEntry(NamedTuple):
     key:    int
     depth:  int
-    score:  float
+    score:  int               # relativ la nod pentru maturi (vezi score_to_tt)
     flag:   int               # 0=exact,1=lower,2=upper
     move:   Optional[teo_chess.Move]
 
-_TT_SIZE = 1 << 18
-_TT: List[Optional[TTEntry]] = [None] * _TT_SIZE
+TT_MB          = 16
+TT_BUCKET_SIZE = 4
+_TT_ENTRY_BYTES = 8 + 8       # key ^ data (Q) + data (Q)
+
+# data = meta (32 biți, jos) | scor (int32, sus)
+# meta = move (15 biți) | depth (8) | flag (2) | generation (6) | ocupat (1)
+_MOVE_BITS   = 15
+_DEPTH_SHIFT = _MOVE_BITS
+_FLAG_SHIFT  = _DEPTH_SHIFT + 8
+_GEN_SHIFT   = _FLAG_SHIFT + 2
+_GEN_MASK    = 0x3f
+_USED        = 1 << 31
+_SCORE_SHIFT = 32
+
+def encode_move(mv: Optional[teo_chess.Move]) -> int:
+    """Mutare compactă pe 15 biți (ca în polyglot): to | from<<6 | promo<<12."""
+    if not mv:
+        return 0
+    return mv.to_square | (mv.from_square << 6) | ((mv.promotion or 0) << 12)
+
+def decode_move(code: int) -> Optional[teo_chess.Move]:
+    if not code:
+        return None
+    return teo_chess.Move((code >> 6) & 0x3f, code & 0x3f, (code >> 12) or None)
+
+class TranspositionTable:
+    """
+    Tabelă de transpoziție cu bucket-uri de TT_BUCKET_SIZE intrări, stocată în
+    array-uri prealocate (fără obiecte Python per intrare).
+
+    Înlocuire: aceeași cheie se suprascrie; altfel se alege intrarea cu cea
+    mai mică valoare depth - 4*vârstă (intrările din căutări vechi pleacă primele).
+
+    Cu `shared=True` tabela stă într-un bloc multiprocessing.shared_memory și
+    poate fi folosită simultan de mai multe procese (Lazy SMP), fără lock-uri:
+    scorul și meta formează un singur cuvânt de 64 de biți, iar cheia e
+    stocată XOR acel cuvânt. Cuvântul e citit o singură dată, validat și
+    decodat din aceeași copie, deci o intrare scrisă pe jumătate (sau
+    amestecată de doi scriitori) nu validează.
+    """
+
+    def __init__(self, mb: int = TT_MB, *, shared: bool = False, _name: Optional[str] = None) -> None:
+        self.generation = 0
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        self.shared = shared or _name is not None
+        self._attach_name = _name
+        self.resize(mb)
+
+    def __reduce__(self):
+        # procesele pornite cu "spawn" se atașează la același bloc după nume
+        if self.shm is None:
+            raise TypeError("only shared transposition tables can be sent to other processes")
+        return (_attach_tt, (self.mb, self.shm.name, self.generation))
+
+    def resize(self, mb: int) -> None:
+        """Realocă tabela la (cel mult) `mb` MiB; conținutul se pierde."""
+        entries = max(TT_BUCKET_SIZE, (mb * 1024 * 1024) // _TT_ENTRY_BYTES)
+        buckets = 1 << ((entries // TT_BUCKET_SIZE).bit_length() - 1)
+        self.mb = mb
+        self.bucket_mask = buckets - 1
+        self.size = buckets * TT_BUCKET_SIZE
+
+        if not self.shared:
+            self.keys = array("Q", bytes(8 * self.size))
+            self.data = array("Q", bytes(8 * self.size))
+            return
+
+        self.close()
+        if self._attach_name is not None:
+            self.shm = shared_memory.SharedMemory(name=self._attach_name)
+            self._attach_name = None
+        else:
+            self.shm = shared_memory.SharedMemory(create=True, size=_TT_ENTRY_BYTES * self.size)
+        buf = self.shm.buf
+        self.keys = buf[:8 * self.size].cast("Q")
+        self.data = buf[8 * self.size:_TT_ENTRY_BYTES * self.size].cast("Q")
+
+    def close(self, unlink: bool = False) -> None:
+        """Eliberează blocul partajat (doar pentru tabele shared)."""
+        if self.shm is None:
+            return
+        for view in (self.keys, self.data):
+            view.release()
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+        self.shm = None
+
+    def clear(self) -> None:
+        if self.shm is not None:
+            self.shm.buf[:_TT_ENTRY_BYTES * self.size] = bytes(_TT_ENTRY_BYTES * self.size)
+        else:
+            self.resize(self.mb)
+        self.generation = 0
+
+    def new_search(self) -> None:
+        """Avansează generația; intrările vechi devin candidate la înlocuire."""
+        self.generation = (self.generation + 1) & _GEN_MASK
+
+    def _find(self, key: int) -> int:
+        """Cuvântul de date validat pentru `key` (o singură citire), sau 0."""
+        base = (key & self.bucket_mask) * TT_BUCKET_SIZE
+        keys, data = self.keys, self.data
+        for i in range(base, base + TT_BUCKET_SIZE):
+            d = data[i]
+            if d and keys[i] ^ d == key:
+                return d
+        return 0
+
+    def probe(self, key: int) -> Optional[TTEntry]:
+        d = self._find(key)
+        if not d:
+            return None
+        score = d >> _SCORE_SHIFT
+        if score & 0x80000000:
+            score -= 1 << 32
+        return TTEntry(key, (d >> _DEPTH_SHIFT) & 0xff, score,
+                       (d >> _FLAG_SHIFT) & 3, decode_move(d & 0x7fff))
+
+    def probe_move(self, key: int) -> Optional[teo_chess.Move]:
+        return decode_move(self._find(key) & 0x7fff)
+
+    def store(self, key: int, depth: int, score: int, flag: int, move: Optional[teo_chess.Move]) -> None:
+        base = (key & self.bucket_mask) * TT_BUCKET_SIZE
+        keys, data, gen = self.keys, self.data, self.generation
+        depth = max(0, min(depth, 0xff))
+
+        victim, victim_value = base, None
+        for i in range(base, base + TT_BUCKET_SIZE):
+            d = data[i]
+            if not d:
+                victim = i
+                break
+            m = d & 0xffffffff
+            if keys[i] ^ d == key:
+                # aceeași poziție: păstrăm intrarea mai adâncă, exceptând scorurile exacte
+                if depth + 2 < (m >> _DEPTH_SHIFT) & 0xff and flag != 0 \
+                        and (m >> _GEN_SHIFT) & _GEN_MASK == gen:
+                    return
+                if not move:
+                    move = decode_move(m & 0x7fff)
+                victim = i
+                break
+            age = (gen - (m >> _GEN_SHIFT)) & _GEN_MASK
+            value = ((m >> _DEPTH_SHIFT) & 0xff) - 4 * age
+            if victim_value is None or value < victim_value:
+                victim, victim_value = i, value
+
+        d = (encode_move(move) | (depth << _DEPTH_SHIFT) | (flag << _FLAG_SHIFT)
+             | (gen << _GEN_SHIFT) | _USED | (score & 0xffffffff) << _SCORE_SHIFT)
+        data[victim] = d
+        keys[victim] = key ^ d
+
+    def hashfull(self) -> int:
+        """Promile ocupate de intrări din generația curentă (eșantion de ~1000 sloturi)."""
+        sample = min(1000, self.size)
+        gen, data = self.generation, self.data
+        used = sum(1 for i in range(sample)
+                   if data[i] & _USED and (data[i] >> _GEN_SHIFT) & _GEN_MASK == gen)
+        return used * 1000 // sample
+
+def _attach_tt(mb: int, name: str, generation: int) -> TranspositionTable:
+    tt = TranspositionTable(mb, _name=name)
+    tt.generation = generation
+    return tt
 
 def _get_key(board: teo_chess.Board) -> int:
-    try:
-        raw = board.transposition_key()
-    except AttributeError:
-        raw = board._transposition_key()
-    if isinstance(raw, tuple):
-        raw = raw[0] ^ raw[1]
-    return raw
-
-def _tt_probe(board: teo_chess.Board, depth: int, alpha: float, beta: float) -> Optional[float]:
-    k = _get_key(board)
-    e = _TT[k & (_TT_SIZE-1)]
-    if e and e.key == k and e.depth >= depth:
-        if e.flag == 0:
-            return e.score
-        if e.flag == 1 and e.score <= alpha:
-            return e.score
-        if e.flag == 2 and e.score >= beta:
-            return e.score
-    return None
-
-def _tt_store(board: teo_chess.Board, depth: int, score: float, flag: int, move: Optional[teo_chess.Move]) -> None:
-    k   = _get_key(board)
-    idx = k & (_TT_SIZE-1)
-    _TT[idx] = TTEntry(k, depth, score, flag, move)
+    return board.zobrist_key()
+
+def _as_teo_board(board: teo_chess.Board) -> teo_chess.Board:
+    """Tablele python-chess (ex. din elo_estimator) sunt refăcute ca teo_chess.Board."""
+    if isinstance(board, teo_chess.Board):
+        return board
+    native = teo_chess.Board(board.root().fen(), chess960=board.chess960)
+    for mv in board.move_stack:
+        native.push(teo_chess.Move.from_uci(mv.uci()))
+    return native
 
 # ——————————————————————————————————————————————————————————
-#                       KILLER & HISTORY HEURISTICS
+#                       PARAMETRI DE CĂUTARE
 # ——————————————————————————————————————————————————————————
 
-_KILLERS: Dict[int,List[Optional[Move]]] = defaultdict(lambda: [None, None, None, None])
-_HISTORY: Dict[teo_chess.Move,int]            = defaultdict(int)
-_COUNTER: Dict[int, Optional[teo_chess.Move]] = defaultdict(lambda: None)
-
 # Pruning and search parameters
 NULL_R            = 2
 MAX_Q_DEPTH       = 4
 FUTILITY_MARGIN   = 100
 CHECK_EXTENSION   = 1
+DELTA_MARGIN      = 200   # quiescence: captura trebuie să poată urca peste alpha
+
+# Domeniul scorurilor: centipioni întregi, din perspectiva părții la mutare.
+# Matul dat la `ply` semimutări de rădăcină valorează MATE - ply.
+MATE              = 32000
+MAX_PLY           = 256
+MATE_BOUND        = MATE - MAX_PLY   # |scor| >= MATE_BOUND -> scor de mat
+INF               = MATE + 1
+DRAW_SCORE        = 0                # repetiție / regula celor 50 de mutări
+
+def mated_in(ply: int) -> int:
+    return -MATE + ply
+
+def score_to_tt(score: int, ply: int) -> int:
+    """Scorurile de mat se stochează relativ la nod, nu la rădăcină."""
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+def score_from_tt(score: int, ply: int) -> int:
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
 
 # Razoring margins per depth
 RAZOR_MARGIN     = {1:200, 2:200, 3:150}
 
+# Oprire în mijlocul iterației: limitele se verifică la fiecare
+# STOP_CHECK_NODES noduri (putere a lui 2)
+STOP_CHECK_NODES  = 16
+HARD_TIME_FACTOR  = 4
+
 # Multi-cut parameters
 MULTI_CUT_DEPTH  = 6
 MULTI_CUT_REDUCE = 3
 MULTI_CUT_COUNT  = 2
 MULTI_CUT_TRY    = 3
 
+# Lazy SMP: helperul i (i >= 1) sare peste adâncimile d pentru care
+# ((d + ply + SMP_SKIP_PHASE[j]) // SMP_SKIP_SIZE[j]) e impar, j = (i - 1) % 20,
+# deci fiecare helper parcurge alt program de adâncimi (tabelele din Stockfish)
+SMP_SKIP_SIZE  = (1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 3, 3, 4, 4, 4, 4, 4, 4, 4, 4)
+SMP_SKIP_PHASE = (0, 1, 0, 1, 2, 3, 0, 1, 2, 3, 4, 5, 0, 1, 2, 3, 4, 5, 6, 7)
+
+def smp_skip_depth(worker_id: int, depth: int, ply: int) -> bool:
+    if worker_id <= 0:
+        return False
+    j = (worker_id - 1) % len(SMP_SKIP_SIZE)
+    return (depth + ply + SMP_SKIP_PHASE[j]) // SMP_SKIP_SIZE[j] % 2 == 1
+
 # Tactical bonuses
 PASSER_BONUS      = 30
 OPEN_FILE_BONUS   = 20
@@ -196,503 +408,1255 @@ class TimeManager:
         # nu lua mai mult de 70% din ce-a mai rămas
         return min(alloc, self.timebank * 0.7)
 
+    def hard_limit(self) -> float:
+        """Plafon dur pentru toată mutarea; căutarea e întreruptă când îl atinge."""
+        moves_left = max(1, self.to_go)
+        return min(HARD_TIME_FACTOR * self.timebank / moves_left + self.inc, self.timebank * 0.7)
 
-# ——————————————————————————————————————————————————————————
-#                         STATIC EXCHANGE EVAL
-# ——————————————————————————————————————————————————————————
-
-def see(board: teo_chess.Board, mv: teo_chess.Move) -> int:
-    victim   = board.piece_type_at(mv.to_square) or mv.promotion or teo_chess.PAWN
-    attacker = board.piece_type_at(mv.from_square) or teo_chess.PAWN
-    gains = [PIECE_VALUES[victim] - PIECE_VALUES[attacker]]
-    board.push(mv)
-    side, depth = board.turn, 1
-    while True:
-        attackers = board.attackers(side, mv.to_square)
-        if not attackers:
-            break
-        sq = min(attackers, key=lambda s: PIECE_VALUES[board.piece_type_at(s) or teo_chess.PAWN])
-        cap = board.piece_type_at(sq) or teo_chess.PAWN
-        gains.append(PIECE_VALUES[cap] - gains[-1])
-        board.push(teo_chess.Move(sq, mv.to_square))
-        side = not side
-        depth += 1
-    for _ in range(depth):
-        board.pop()
-    for i in range(len(gains)-2, -1, -1):
-        gains[i] = max(-gains[i+1], gains[i])
-    return gains[0]
-
-# ——————————————————————————————————————————————————————————
-#                        MOVE ORDERING
-# ——————————————————————————————————————————————————————————
-
-def score_move(board: teo_chess.Board, mv: teo_chess.Move, ply: int) -> int:
-    # 1) PV-move din TT
-    entry = _TT[_get_key(board) & (_TT_SIZE - 1)]
-    if entry and entry.move == mv:
-        return 10_000_000
 
-    # 2) Counter-move heuristic
-    cnt = _COUNTER.get(ply)
-    if cnt is not None and mv == cnt:
-        return 9_750_000
+class Limits(NamedTuple):
+    """Limitele unei căutări (echivalentul lui `go` din UCI)."""
+    time_left:   float           = math.inf
+    increment:   float           = 0.0
+    moves_to_go: int             = 40
+    depth:       int             = 6
+    nodes:       Optional[int]   = None
+    movetime:    Optional[float] = None
 
-    # 3) Killer-moves
-    killers = _KILLERS[ply]
-    if mv == killers[0]:
-        return 9_000_000
-    if mv in killers[1:4]:
-        return 8_000_000
 
-    # 4) Capturi (SEE + history)
-    if board.is_capture(mv):
-        return see(board, mv) * 100 + _HISTORY[mv]
+class SearchInfo(NamedTuple):
+    """
+    Rezultatul unei iterații complete de iterative deepening. Cu `partial=True`
+    e o schimbare a celei mai bune mutări în mijlocul iterației `depth` (doar
+    scoruri din interiorul ferestrei, nu fail-high-uri ale aspirației).
+    """
+    depth:    int
+    score:    int                    # perspectiva părții la mutare; MATE - ply pentru mat
+    pv:       List[teo_chess.Move]
+    nodes:    int
+    nps:      int
+    time:     float
+    hashfull: int
+    partial:  bool = False
 
-    # 5) Rest: history heuristic
-    return _HISTORY[mv]
+class SearchAborted(Exception):
+    """Căutarea a atins limita de timp/noduri sau a primit stop din exterior."""
 
 
+# ——————————————————————————————————————————————————————————
+#                         STATIC EXCHANGE EVAL
+# ——————————————————————————————————————————————————————————
 
-def ordered_moves(board: teo_chess.Board, ply: int) -> List[teo_chess.Move]:
-    mvs = list(board.legal_moves)
-    mvs.sort(key=lambda mv: score_move(board,mv,ply), reverse=True)
-    return mvs
+def see(board: teo_chess.Board, mv: teo_chess.Move) -> int:
+    # SEE pe bitboard-uri (cu x-ray), fără push/pop
+    return board.see(mv)
 
 # ——————————————————————————————————————————————————————————
 #                       EVALUATION FUNCTIONS
 # ——————————————————————————————————————————————————————————
 
-def game_phase(board: teo_chess.Board) -> float:
-    total = sum(PIECE_VALUES[p] * len(board.pieces(p,c))
-                for p in PIECE_VALUES for c in (teo_chess.WHITE,teo_chess.BLACK))
-    return max(0.0, min(1.0, total / (2 * PIECE_VALUES[teo_chess.QUEEN] * 2)))
+def psqt_score(board: teo_chess.Board) -> Tuple[int, int, int]:
+    # (mg, eg, phase) din acumulatorul tablei; atașăm PSQT la prima utilizare
+    if board.psqt is not PSQT:
+        board.set_psqt(PSQT)
+    return board.psqt_score()
+
+PHASE_SCALE = 256
 
-def evaluate_passers(board: teo_chess.Board) -> float:
-    bonus = 0.0
+def _phase_of(total: int) -> int:
+    # faza de mijloc în [0, PHASE_SCALE]
+    return max(0, min(PHASE_SCALE, total * PHASE_SCALE // (2 * PIECE_VALUES[teo_chess.QUEEN] * 2)))
+
+def game_phase(board: teo_chess.Board) -> float:
+    return _phase_of(psqt_score(board)[2]) / PHASE_SCALE
+
+# Măști pentru termenii de evaluare
+_BB_CENTER_16   = (teo_chess.BB_FILE_C | teo_chess.BB_FILE_D | teo_chess.BB_FILE_E | teo_chess.BB_FILE_F) & \
+                  (teo_chess.BB_RANK_3 | teo_chess.BB_RANK_4 | teo_chess.BB_RANK_5 | teo_chess.BB_RANK_6)
+_BB_EDGE_FILES  = teo_chess.BB_FILE_A | teo_chess.BB_FILE_H
+# bonusul de mobilitate fix pe pătratul destinație (centru +2, margine +1)
+_TO_SQUARE_BONUS = [2 * bool(bb & _BB_CENTER_16) + bool(bb & _BB_EDGE_FILES) for bb in teo_chess.BB_SQUARES]
+# înmulțit cu un octet de coloane (rangul 1) îl copiază pe toate rangurile
+_FILE_FILL = 0x0101_0101_0101_0101
+
+# ── pawn hash ──
+
+PAWN_HASH_ENTRIES = 1 << 14
+
+class PawnEntry(NamedTuple):
+    key:        int
+    passed:     Tuple[int, int]   # bitboard-uri indexate după culoare
+    isolated:   Tuple[int, int]
+    doubled:    Tuple[int, int]
+    open_files: int               # coloanele fără niciun pion
+    score:      int               # pioni dublați/izolați + pioni liberi
+
+def pawn_structure(board: teo_chess.Board) -> PawnEntry:
+    """Termenii care depind doar de pioni, calculați o singură dată pe structură."""
+    pawns_bb = board.pawns
+    open_files = (~teo_chess.fill_down(pawns_bb) & 0xff) * _FILE_FILL
+
+    # „în față” = spre rangurile mari pentru negru, spre cele mici pentru alb:
+    # pionul e liber dacă niciun pion nu stă pe coloana lui în acea direcție
+    passed = (pawns_bb & board.occupied_co[teo_chess.BLACK] & ~teo_chess.fill_down(pawns_bb >> 8),
+              pawns_bb & board.occupied_co[teo_chess.WHITE] & ~teo_chess.fill_up(pawns_bb << 8))
+    isolated, doubled = [0, 0], [0, 0]
+    score = 0
     for color, sign in ((teo_chess.BLACK,1),(teo_chess.WHITE,-1)):
-        step = 1 if color==teo_chess.BLACK else -1
-        for sq in board.pieces(teo_chess.PAWN, color):
-            f, r = sq%8, sq//8
-            front = range(r+step, 8 if color==teo_chess.BLACK else -1, step)
-            if all(board.piece_type_at(rr*8+f)!=teo_chess.PAWN for rr in front if 0<=rr<8):
-                bonus += sign * PASSER_BONUS
-    return bonus
-
-def evaluate_open_files(board: teo_chess.Board) -> float:
-    score = 0.0
+        own = pawns_bb & board.occupied_co[color]
+        files = teo_chess.fill_down(own) & 0xff
+        isolated_files = files & ~((files << 1) | (files >> 1))
+        isolated[color] = own & isolated_files * _FILE_FILL
+        doubled[color] = own & (teo_chess.fill_down(own >> 8) | teo_chess.fill_up(own << 8))
+        # -20 pentru fiecare pion în plus pe o coloană și pentru fiecare coloană izolată
+        score += sign * (PASSER_BONUS * teo_chess.popcount(passed[color])
+                         - 20 * (teo_chess.popcount(own) - teo_chess.popcount(files))
+                         - 20 * teo_chess.popcount(isolated_files))
+
+    return PawnEntry(board.pawn_key(), passed, tuple(isolated), tuple(doubled), open_files, score)
+
+class PawnHash:
+    """
+    Tabelă de structuri de pioni indexată după cheia Zobrist doar a pionilor:
+    structura se schimbă rar în căutare, deci termenii de pioni se plătesc o
+    singură dată. Un slot per index, înlocuire mereu.
+    """
+
+    def __init__(self, entries: int = PAWN_HASH_ENTRIES) -> None:
+        self.size = 1 << (max(1, entries).bit_length() - 1)
+        self.mask = self.size - 1
+        self.clear()
+
+    def clear(self) -> None:
+        self.entries: List[Optional[PawnEntry]] = [None] * self.size
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, board: teo_chess.Board) -> PawnEntry:
+        key = board.pawn_key()
+        i = key & self.mask
+        e = self.entries[i]
+        if e is not None and e.key == key:
+            self.hits += 1
+            return e
+        self.misses += 1
+        e = self.entries[i] = pawn_structure(board)
+        return e
+
+def evaluate_passers(board: teo_chess.Board, pawns: Optional[PawnEntry] = None) -> int:
+    pawns = pawns or pawn_structure(board)
+    return PASSER_BONUS * (teo_chess.popcount(pawns.passed[teo_chess.BLACK])
+                           - teo_chess.popcount(pawns.passed[teo_chess.WHITE]))
+
+def evaluate_open_files(board: teo_chess.Board, pawns: Optional[PawnEntry] = None) -> int:
+    pawns = pawns or pawn_structure(board)
+    score = 0
     for color, sign in ((teo_chess.BLACK,1),(teo_chess.WHITE,-1)):
-        for file in range(8):
-            if all(board.piece_type_at(r*8+file)!=teo_chess.PAWN for r in range(8)):
-                for sq in board.pieces(teo_chess.ROOK, color):
-                    if sq%8==file:
-                        score += sign * OPEN_FILE_BONUS
+        rooks = board.rooks & board.occupied_co[color] & pawns.open_files
+        score += sign * OPEN_FILE_BONUS * teo_chess.popcount(rooks)
     return score
 
-def evaluate_outposts(board: teo_chess.Board) -> float:
-    bonus = 0.0
-    for color, sign in ((teo_chess.BLACK,1),(teo_chess.WHITE,-1)):
-        enemy = not color
-        step = 1 if color==teo_chess.BLACK else -1
-        for ptype in (teo_chess.KNIGHT, teo_chess.BISHOP):
-            for sq in board.pieces(ptype, color):
-                f, r = sq%8, sq//8
-                br, fr = r-step, r+step
-                sup = False
-                if 0<=br<8:
-                    pc = board.piece_at(br*8+f)
-                    if pc and pc.piece_type==teo_chess.PAWN and pc.color==color:
-                        sup = True
-                att = False
-                if 0<=fr<8:
-                    pc2 = board.piece_at(fr*8+f)
-                    if pc2 and pc2.piece_type==teo_chess.PAWN and pc2.color==enemy:
-                        att = True
-                if sup and not att:
-                    bonus += sign * OUTPOST_BONUS
-    return bonus
-
-def evaluate_king_safety(board: teo_chess.Board) -> float:
-    score = 0.0
+def evaluate_outposts(board: teo_chess.Board) -> int:
+    # piesă ușoară cu pion propriu în spate pe aceeași coloană și fără pion inamic în față
+    white_pawns = board.pawns & board.occupied_co[teo_chess.WHITE]
+    black_pawns = board.pawns & board.occupied_co[teo_chess.BLACK]
+    minors = board.knights | board.bishops
+    black = minors & board.occupied_co[teo_chess.BLACK] & (black_pawns << 8) & ~(white_pawns >> 8)
+    white = minors & board.occupied_co[teo_chess.WHITE] & (white_pawns >> 8) & ~(black_pawns << 8)
+    return OUTPOST_BONUS * (teo_chess.popcount(black) - teo_chess.popcount(white))
+
+def evaluate_king_safety(board: teo_chess.Board, pawns: Optional[PawnEntry] = None) -> int:
+    pawns = pawns or pawn_structure(board)
+    h_open = bool(pawns.open_files & teo_chess.BB_FILE_H)
+    score = 0
     for color, sign in ((teo_chess.WHITE,1),(teo_chess.BLACK,-1)):
-        ksq = board.king(color); kf, kr = ksq%8, ksq//8
-        for df in (-1,0,1):
-            file = kf+df
-            if 0<=file<8:
-                for dr in (1,2,3):
-                    r = kr + (dr if color==teo_chess.WHITE else -dr)
-                    if 0<=r<8 and board.piece_type_at(r*8+file)!=teo_chess.PAWN:
-                        score -= sign * 10
-        if all(board.piece_type_at(r*8+7)!=teo_chess.PAWN for r in range(8)) and abs(kf-7)<=1:
+        ksq = board.king(color)
+        # pătratele scutului fără pion (de orice culoare)
+        score -= sign * 10 * teo_chess.popcount(teo_chess.BB_KING_SHIELD[color][ksq] & ~board.pawns)
+        if h_open and ksq%8 >= 6:
             score -= sign * 20
     return score
 
-def evaluate_pawn_storm(board: teo_chess.Board) -> float:
-    score = 0.0
+def evaluate_pawn_storm(board: teo_chess.Board) -> int:
+    score = 0
+    supporters = board.pawns | board.knights | board.bishops
     for color, sign in ((teo_chess.WHITE,1),(teo_chess.BLACK,-1)):
         ek = board.king(not color); ekf, ekr = ek%8, ek//8
-        for sq in board.pieces(teo_chess.PAWN, color):
-            f, r = sq%8, sq//8
-            if abs(f-ekf)<=1:
-                adv = (r-ekr) if color==teo_chess.WHITE else (ekr-r)
-                if adv>0:
-                    support = sum(
-                        1 for df,dr in [(-1,0),(1,0),(0,1),(0,-1)]
-                        if 0<=r+dr<8 and 0<=f+df<8 and
-                           board.piece_type_at((r+dr)*8+f+df) in (teo_chess.PAWN,teo_chess.KNIGHT,teo_chess.BISHOP)
-                    )
-                    score += sign * (5*adv + 3*support)
+        near = teo_chess.BB_FILES[ekf] | teo_chess.BB_ADJACENT_FILES[ekf]
+        for sq in teo_chess.scan_reversed(board.pawns & board.occupied_co[color] & near):
+            r = sq//8
+            adv = (r-ekr) if color==teo_chess.WHITE else (ekr-r)
+            if adv>0:
+                # vecinii ortogonali
+                cross = teo_chess.BB_KING_ATTACKS[sq] & (teo_chess.BB_RANKS[r] | teo_chess.BB_FILES[sq%8])
+                score += sign * (5*adv + 3*teo_chess.popcount(cross & supporters))
     return score
 
-def evaluate_outposts_advanced(board: teo_chess.Board) -> float:
-    score = 0.0
+# penalizarea piesei ușoare departe de regele propriu: 2 * max(0, distanța Manhattan - 2)
+_KING_DISTANCE_PENALTY = [[2 * max(0, abs(k//8 - sq//8) + abs(k%8 - sq%8) - 2) for sq in teo_chess.SQUARES]
+                          for k in teo_chess.SQUARES]
+
+def evaluate_outposts_advanced(board: teo_chess.Board) -> int:
+    # piese ușoare care nu atacă pioni inamici: +10 per apărător, minus distanța față de rege
+    score = 0
+    occupied = board.occupied
     for color, sign in ((teo_chess.WHITE,1),(teo_chess.BLACK,-1)):
-        ksq = board.king(color)
-        for ptype in (teo_chess.KNIGHT, teo_chess.BISHOP):
-            for sq in board.pieces(ptype, color):
-                if not any(
-                    board.piece_type_at(a)==teo_chess.PAWN and board.piece_at(a).color!=color
-                    for a in board.attacks(sq)
-                ):
-                    atk = len(board.attackers(color, sq))
-                    dist = abs((sq//8)-(ksq//8)) + abs((sq%8)-(ksq%8))
-                    score += sign * (atk*10 - max(0,dist-2)*2)
+        our = board.occupied_co[color]
+        penalty = _KING_DISTANCE_PENALTY[board.king(color)]
+        enemy_pawns = board.pawns & board.occupied_co[not color]
+        outposts = [sq for sq in teo_chess.scan_reversed(board.knights & our)
+                    if not teo_chess.BB_KNIGHT_ATTACKS[sq] & enemy_pawns]
+        outposts += [sq for sq in teo_chess.scan_reversed(board.bishops & our)
+                     if not teo_chess.BB_DIAG_ATTACKS[sq][teo_chess.BB_DIAG_MASKS[sq] & occupied] & enemy_pawns]
+        for sq in outposts:
+            score += sign * (10 * teo_chess.popcount(board._attackers_mask(color, sq, occupied)) - penalty[sq])
     return score
 
-def evaluate_mobility_refined(board: teo_chess.Board) -> float:
-    mob = list(board.legal_moves)
-    base = len(mob); bonus = 0
-    for mv in mob:
-        f,r = mv.to_square%8, mv.to_square//8
-        if 2<=f<=5 and 2<=r<=5: bonus += 2
-        if all(board.piece_type_at(rr*8+f)!=teo_chess.PAWN for rr in range(8)): bonus += 1
-        if f in (0,7): bonus += 1
+def evaluate_mobility_refined(board: teo_chess.Board, pawns: Optional[PawnEntry] = None,
+                              moves: Optional[List[teo_chess.Move]] = None) -> float:
+    pawns = pawns or pawn_structure(board)
+    mob = moves if moves is not None else list(board.legal_moves)
+    open_files = pawns.open_files
+    base = len(mob)
+    bonus = sum([_TO_SQUARE_BONUS[mv.to_square] + (open_files >> mv.to_square & 1) for mv in mob])
     return 0.1*base + 0.05*bonus
 
-def evaluate_rook_on_seventh(board: teo_chess.Board) -> float:
-    score = 0.0
-    for color, sign, tr in ((teo_chess.WHITE,1,6),(teo_chess.BLACK,-1,1)):
-        for sq in board.pieces(teo_chess.ROOK, color):
-            if sq//8 == tr:
-                f = sq%8
-                if not any(
-                    board.piece_type_at((tr + (1 if color==teo_chess.WHITE else -1))*8+f)==teo_chess.PAWN
-                    and board.piece_at((tr + (1 if color==teo_chess.WHITE else -1))*8+f).color!=color
-                    for _ in (0,)
-                ):
-                    score += sign * 30
-    return score
-
-def evaluate_bishop_vs_knight(board: teo_chess.Board) -> float:
-    score = 0.0
+def evaluate_rook_on_seventh(board: teo_chess.Board) -> int:
+    # turn pe rangul 7 (2 pentru negru) fără pion inamic imediat în față
+    white_pawns = board.pawns & board.occupied_co[teo_chess.WHITE]
+    black_pawns = board.pawns & board.occupied_co[teo_chess.BLACK]
+    white = board.rooks & board.occupied_co[teo_chess.WHITE] & teo_chess.BB_RANK_7 & ~(black_pawns >> 8)
+    black = board.rooks & board.occupied_co[teo_chess.BLACK] & teo_chess.BB_RANK_2 & ~(white_pawns << 8)
+    return 30 * (teo_chess.popcount(white) - teo_chess.popcount(black))
+
+def evaluate_bishop_vs_knight(board: teo_chess.Board, pawns: Optional[PawnEntry] = None) -> int:
+    pawns = pawns or pawn_structure(board)
+    score = 0
     for color, sign in ((teo_chess.WHITE,1),(teo_chess.BLACK,-1)):
-        bcount = len(board.pieces(teo_chess.BISHOP, color))
-        if bcount>=2:
-            of = sum(1 for f in range(8)
-                     if all(board.piece_type_at(r*8+f)!=teo_chess.PAWN for r in range(8)))
+        if teo_chess.popcount(board.bishops & board.occupied_co[color]) >= 2:
+            of = teo_chess.popcount(pawns.open_files & teo_chess.BB_RANK_1)
             score += sign * min(20,5*of)
-        for sq in board.pieces(teo_chess.KNIGHT, color):
-            f,r = sq%8, sq//8
-            if not any(
-                board.piece_type_at(rr*8+f)==teo_chess.PAWN
-                and ((rr>r) if color==teo_chess.WHITE else (rr<r))
-                for rr in range(8)
-            ):
-                score -= sign * 10
+        # cai fără niciun pion în față pe coloana lor
+        if color == teo_chess.WHITE:
+            open_front = ~teo_chess.fill_down(board.pawns >> 8)
+        else:
+            open_front = ~teo_chess.fill_up(board.pawns << 8)
+        score -= sign * 10 * teo_chess.popcount(board.knights & board.occupied_co[color] & open_front)
     return score
 
-def evaluate_material_imbalance(board: teo_chess.Board) -> float:
-    score = 0.0
+def evaluate_material_imbalance(board: teo_chess.Board) -> int:
+    score = 0
     for color, sign in ((teo_chess.WHITE,1),(teo_chess.BLACK,-1)):
-        kn = len(board.pieces(teo_chess.KNIGHT, color))
-        bi = len(board.pieces(teo_chess.BISHOP,  color))
-        pw = len(board.pieces(teo_chess.PAWN,    color))
-        if kn>=2 and bi==1 and pw>=1:
+        occ = board.occupied_co[color]
+        kn = teo_chess.popcount(board.knights & occ)
+        bi = teo_chess.popcount(board.bishops & occ)
+        if kn>=2 and bi==1 and board.pawns & occ:
             score += sign * 15
     return score
 
-def evaluate(board: teo_chess.Board) -> float:
-    if board.is_checkmate():
-        return -99999.0 if board.turn else 99999.0
-    if board.is_stalemate() or board.is_insufficient_material():
-        return 0.0
-
-    mg = game_phase(board)
-    eg = 1.0 - mg
-    sc = 0.0
-
-    # material + PST
-    for p,tbl in TABLES.items():
-        base = PIECE_VALUES[p]
-        for sq in board.pieces(p, teo_chess.BLACK):
-            sc += base + tbl[sq]
-        for sq in board.pieces(p, teo_chess.WHITE):
-            sc -= base + tbl[teo_chess.square_mirror(sq)]
-
-    # king PST interpolation
-    for sq in board.pieces(teo_chess.KING, teo_chess.BLACK):
-        sc += mg * KING_MG[sq] + eg * KING_EG[sq]
-    for sq in board.pieces(teo_chess.KING, teo_chess.WHITE):
-        msq = teo_chess.square_mirror(sq)
-        sc -= mg * KING_MG[msq] + eg * KING_EG[msq]
+def evaluate(board: teo_chess.Board, pawn_hash: Optional[PawnHash] = None,
+             moves: Optional[List[teo_chess.Move]] = None) -> int:
+    """
+    Evaluare statică în centipioni întregi, din perspectiva părții la mutare.
+    Mat: -MATE (căutarea adaugă distanța în ply); pat și material insuficient: 0.
+    """
+    # o singură generare de mutări legale: mat/pat + ambele mobilități
+    if moves is None:
+        moves = list(board.legal_moves)
+    if not moves:
+        return -MATE if board.is_check() else DRAW_SCORE
+    if board.is_insufficient_material():
+        return DRAW_SCORE
+
+    # material + PST (regele interpolat mg/eg), O(1) din acumulator;
+    # termenii de mai jos sunt, ca istoric, pozitivi pentru negru
+    psqt_mg, psqt_eg, phase = psqt_score(board)
+    mg = _phase_of(phase)
+    sc = -((mg * psqt_mg + (PHASE_SCALE - mg) * psqt_eg) // PHASE_SCALE)
+
+    white, black = board.occupied_co[teo_chess.WHITE], board.occupied_co[teo_chess.BLACK]
 
     # bishop pair
-    if len(board.pieces(teo_chess.BISHOP, teo_chess.BLACK)) >= 2:
+    if teo_chess.popcount(board.bishops & black) >= 2:
         sc += 50
-    if len(board.pieces(teo_chess.BISHOP, teo_chess.WHITE)) >= 2:
+    if teo_chess.popcount(board.bishops & white) >= 2:
         sc -= 50
 
-    # pawn structure
-    for color, sign in ((teo_chess.BLACK,1),(teo_chess.WHITE,-1)):
-        files = [sq%8 for sq in board.pieces(teo_chess.PAWN, color)]
-        for f in set(files):
-            cnt = files.count(f)
-            if cnt>1:
-                sc += sign * -20 * (cnt-1)
-            if all(nb not in files for nb in (f-1,f+1)):
-                sc += sign * -20
+    # pawn structure + passers (din pawn hash)
+    pawns = pawn_hash.probe(board) if pawn_hash is not None else pawn_structure(board)
+    sc += pawns.score
 
     # center control
-    for c in (teo_chess.D4, teo_chess.E4, teo_chess.D5, teo_chess.E5):
-        pc = board.piece_at(c)
-        if pc:
-            sc += 25 if pc.color==teo_chess.BLACK else -25
+    sc += 25 * (teo_chess.popcount(black & teo_chess.BB_CENTER) - teo_chess.popcount(white & teo_chess.BB_CENTER))
 
     # tactical & positional bonuses
-    sc += evaluate_passers(board)
-    sc += evaluate_open_files(board)
+    sc += evaluate_open_files(board, pawns)
     sc += evaluate_outposts(board)
-    sc += evaluate_king_safety(board)
+    sc += evaluate_king_safety(board, pawns)
     sc += evaluate_pawn_storm(board)
     sc += evaluate_outposts_advanced(board)
-    sc += evaluate_mobility_refined(board)
+    sc += evaluate_mobility_refined(board, pawns, moves)
     sc += evaluate_rook_on_seventh(board)
-    sc += evaluate_bishop_vs_knight(board)
+    sc += evaluate_bishop_vs_knight(board, pawns)
     sc += evaluate_material_imbalance(board)
 
     # mobility
-    mob = board.legal_moves.count()
+    mob = len(moves)
     sc += 0.1 * mob * (1 if board.turn==teo_chess.BLACK else -1)
 
     # king safety (attacks around king)
     for color, sign in ((teo_chess.BLACK,1),(teo_chess.WHITE,-1)):
         ksq = board.king(color)
-        att = sum(1 for a in board.attacks(ksq) if board.is_attacked_by(not color,a))
+        att = teo_chess.popcount(teo_chess.BB_KING_ATTACKS[ksq] & board.attacked_mask(not color))
         sc += sign * -10 * min(att,4)
 
-    return sc
+    sc = round(sc)
+    return sc if board.turn == teo_chess.BLACK else -sc
 
 # ——————————————————————————————————————————————————————————
-#                          QUIESCENCE SEARCH
+#                       EVAL CACHE
 # ——————————————————————————————————————————————————————————
 
-def quiesce(board: teo_chess.Board, alpha: float, beta: float, depth: int=0) -> float:
-    stand = evaluate(board)
-    if stand + FUTILITY_MARGIN*(MAX_Q_DEPTH-depth) < alpha or depth>=MAX_Q_DEPTH:
-        return stand
-    if stand>alpha:
-        alpha = stand
-
-    for mv in ordered_moves(board, depth):
-        if not board.is_capture(mv):
-            continue
-        if see(board,mv) + 10 < alpha:
-            continue
-        board.push(mv)
-        val = -quiesce(board, -beta, -alpha, depth+1)
-        board.pop()
-        if val>=beta:
-            return beta
-        if val>alpha:
-            alpha = val
-    return alpha
+EVAL_CACHE_ENTRIES = 1 << 16
+
+class EvalCache:
+    """
+    Cache de evaluări indexat după cheia Zobrist (care include și partea la
+    mutare): un slot per index, înlocuire mereu, în array-uri prealocate.
+    Cheia completă se păstrează pentru validare; hits/misses se contorizează.
+    Evaluările ratate folosesc pawn hash-ul propriu.
+    """
+
+    def __init__(self, entries: int = EVAL_CACHE_ENTRIES) -> None:
+        self.size = 1 << (max(1, entries).bit_length() - 1)
+        self.mask = self.size - 1
+        self.clear()
+
+    def clear(self) -> None:
+        self.keys   = array("Q", bytes(8 * self.size))
+        self.scores = array("i", bytes(4 * self.size))
+        self.pawn_hash = PawnHash()
+        self.hits = 0
+        self.misses = 0
+
+    def evaluate(self, board: teo_chess.Board, node: Optional["NodeMoves"] = None) -> int:
+        key = board.zobrist_key()
+        i = key & self.mask
+        # cheia 0 marchează slotul gol
+        if key and self.keys[i] == key:
+            self.hits += 1
+            return self.scores[i]
+        self.misses += 1
+        sc = evaluate(board, self.pawn_hash, node.legal if node is not None else None)
+        self.keys[i] = key
+        self.scores[i] = sc
+        return sc
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+class NodeMoves:
+    """
+    Mutările legale ale unui nod, generate leneș o singură dată și împărțite
+    între evaluare (mat/pat, mobilitate) și ordonarea mutărilor.
+    """
+    __slots__ = ("board", "_legal")
+
+    def __init__(self, board: teo_chess.Board) -> None:
+        self.board = board
+        self._legal: Optional[List[teo_chess.Move]] = None
+
+    @property
+    def generated(self) -> bool:
+        return self._legal is not None
+
+    @property
+    def legal(self) -> List[teo_chess.Move]:
+        if self._legal is None:
+            self._legal = list(self.board.legal_moves)
+        return self._legal
+
+def _mvv_lva(board: teo_chess.Board, mv: teo_chess.Move) -> int:
+    """Most Valuable Victim / Least Valuable Attacker (en passant: victima e pion)."""
+    victim = board.piece_type_at(mv.to_square) or teo_chess.PAWN
+    return victim * 8 - (board.piece_type_at(mv.from_square) or 0) + (mv.promotion or 0) * 8
 
 # ——————————————————————————————————————————————————————————
-#                      NEGASCOUT (PVS) + NULL‐MOVE + LMR + EXT
+#                  SEARCHER (TT + HEURISTICI + STATISTICI)
 # ——————————————————————————————————————————————————————————
 
-def negascout(board: teo_chess.Board,
-              depth: int,
-              alpha: float,
-              beta: float,
-              ply: int = 0
-) -> Tuple[Optional[teo_chess.Move], float]:
+class Searcher:
     """
-    Principal Variation Search (PVS) cu:
-      - razoring
-      - multi-cut
-      - transposition table probe
-      - null-move pruning
-      - hard late-move pruning
-      - late-move reductions (LMR)
-      - aspiration re-search (în find_best_move)
-      - killer moves, counter moves, history heuristic
+    Starea unei căutări: tabela de transpoziție, killer/history/counter-moves
+    și statisticile. Fiecare partidă (sau thread) își ține propriul Searcher,
+    deci căutările independente nu își amestecă tabelele; un Searcher
+    refolosit între mutări păstrează TT-ul și heuristicile „calde”.
     """
 
-    # ── 1) Razoring ──
-    if depth in RAZOR_MARGIN:
-        static = evaluate(board)
-        if static + RAZOR_MARGIN[depth] < alpha:
-            return None, static
-
-    # ── 2) Multi-cut ──
-    if depth >= MULTI_CUT_DEPTH and ply > 0:
-        cnt = 0
-        for mv in ordered_moves(board, ply)[:MULTI_CUT_TRY]:
+    def __init__(self, tt_mb: int = TT_MB, threads: int = 1, *, tt: Optional[TranspositionTable] = None) -> None:
+        self.threads = max(1, threads)
+        self.tt = tt if tt is not None else TranspositionTable(tt_mb, shared=self.threads > 1)
+        self.eval_cache = EvalCache()
+        self.killers: Dict[int, List[Optional[teo_chess.Move]]] = defaultdict(lambda: [None, None, None, None])
+        self.history: Dict[teo_chess.Move, int]            = defaultdict(int)
+        self.counter: Dict[int, Optional[teo_chess.Move]]   = defaultdict(lambda: None)
+        self.nodes = 0
+        self.depth = 0
+        self.start_time = time.time()
+        self.deadline = math.inf
+        self.node_limit = math.inf
+        self.stop_event: Union[threading.Event, multiprocessing.synchronize.Event] = threading.Event()
+        # PV triunghiular: pv[ply] = varianta principală începând de la ply
+        self.pv: List[List[teo_chess.Move]] = [[] for _ in range(MAX_PLY + 1)]
+        self.pv_line: List[teo_chess.Move] = []
+        self.root_len = 0
+        self.on_info: Optional[Callable[[SearchInfo], None]] = None
+        self.root_updates = False
+        self.last_info: Optional[SearchInfo] = None
+
+    def reset(self) -> None:
+        """Golește TT-ul și heuristicile (partidă nouă)."""
+        self.tt.clear()
+        self.eval_cache.clear()
+        self.killers.clear()
+        self.history.clear()
+        self.counter.clear()
+        self.nodes = 0
+
+    def set_threads(self, threads: int) -> None:
+        threads = max(1, threads)
+        if (threads > 1) != (self.threads > 1):
+            self.tt.close(unlink=True)
+            self.tt = TranspositionTable(self.tt.mb, shared=threads > 1)
+        self.threads = threads
+
+    def resize_tt(self, mb: int) -> None:
+        self.tt.close(unlink=True)
+        self.tt = TranspositionTable(mb, shared=self.threads > 1)
+
+    def close(self) -> None:
+        """Eliberează memoria partajată a TT-ului (dacă există)."""
+        self.tt.close(unlink=True)
+
+    def stop(self) -> None:
+        """Cere oprirea căutării curente (sigur de apelat din alt thread)."""
+        self.stop_event.set()
+
+    def _check_limits(self) -> None:
+        if (self.stop_event.is_set()
+                or self.nodes >= self.node_limit
+                or time.time() >= self.deadline):
+            raise SearchAborted()
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = max(1e-9, time.time() - self.start_time)
+        return {
+            "depth":    self.depth,
+            "nodes":    self.nodes,
+            "nps":      int(self.nodes / elapsed),
+            "time":     elapsed,
+            "hashfull": self.tt.hashfull(),
+            "eval_hits":   self.eval_cache.hits,
+            "eval_misses": self.eval_cache.misses,
+            "pawn_hits":   self.eval_cache.pawn_hash.hits,
+            "pawn_misses": self.eval_cache.pawn_hash.misses,
+        }
+
+    def _info(self, depth: int, score: int, pv: List[teo_chess.Move], partial: bool = False) -> SearchInfo:
+        st = self.stats()
+        return SearchInfo(depth, score, pv, st["nodes"], st["nps"], st["time"], st["hashfull"], partial)
+
+    # ── transposition table ──
+
+    @staticmethod
+    def _tt_cutoff(e: Optional[TTEntry], depth: int, alpha: int, beta: int, ply: int) -> Optional[int]:
+        if e and e.depth >= depth:
+            score = score_from_tt(e.score, ply)
+            if e.flag == 0:
+                return score
+            if e.flag == 1 and score >= beta:
+                return score
+            if e.flag == 2 and score <= alpha:
+                return score
+        return None
+
+    # ── move ordering ──
+
+    def score_move(self, board: teo_chess.Board, mv: teo_chess.Move, ply: int) -> int:
+        # 1) PV-move din TT
+        if self.tt.probe_move(_get_key(board)) == mv:
+            return 10_000_000
+
+        # 2) Counter-move heuristic
+        cnt = self.counter.get(ply)
+        if cnt is not None and mv == cnt:
+            return 9_750_000
+
+        # 3) Killer-moves
+        killers = self.killers[ply]
+        if mv == killers[0]:
+            return 9_000_000
+        if mv in killers[1:4]:
+            return 8_000_000
+
+        # 4) Capturi (SEE + history)
+        if board.is_capture(mv):
+            return see(board, mv) * 100 + self.history[mv]
+
+        # 5) Rest: history heuristic
+        return self.history[mv]
+
+    def ordered_moves(self, board: teo_chess.Board, ply: int,
+                      moves: Optional[List[teo_chess.Move]] = None) -> List[teo_chess.Move]:
+        mvs = list(moves) if moves is not None else list(board.legal_moves)
+        mvs.sort(key=lambda mv: self.score_move(board,mv,ply), reverse=True)
+        return mvs
+
+    def move_picker(self, board: teo_chess.Board, ply: int,
+                    tt_move: Optional[teo_chess.Move] = None,
+                    node: Optional[NodeMoves] = None) -> Iterator[teo_chess.Move]:
+        """
+        Generator de mutări pe etape, generate leneș:
+          1) mutarea din TT (doar validată, nu generată)
+          2) capturi bune (MVV-LVA, SEE >= 0) și promovări în damă
+          3) killer moves, apoi counter-move (validate)
+          4) mutări liniștite sortate după history
+          5) capturi proaste (SEE < 0)
+        La un beta cutoff etapele rămase nu mai sunt generate deloc. Dacă nodul
+        are deja mutările legale (din evaluare), etapele doar le împart.
+        """
+        legal = node.legal if node is not None and node.generated else None
+        done: List[teo_chess.Move] = []
+
+        # 1) TT move
+        if tt_move is not None and board.is_legal(tt_move):
+            done.append(tt_move)
+            yield tt_move
+
+        # 2) Capturi bune + promovări în damă
+        us = board.turn
+        if legal is not None:
+            captures = [mv for mv in legal if board.is_capture(mv) and mv not in done]
+        else:
+            captures = [mv for mv in board.generate_legal_captures() if mv not in done]
+        captures.sort(key=lambda mv: _mvv_lva(board, mv), reverse=True)
+        bad_captures = []
+        for mv in captures:
+            attacker = board.piece_type_at(mv.from_square)
+            victim = board.piece_type_at(mv.to_square) or teo_chess.PAWN
+            if PIECE_VALUES[victim] < PIECE_VALUES[attacker] and not board.see_ge(mv, 0):
+                bad_captures.append(mv)
+                continue
+            yield mv
+
+        promo_from = board.pawns & board.occupied_co[us] & (teo_chess.BB_RANK_7 if us else teo_chess.BB_RANK_2)
+        if promo_from:
+            promotions = (board.generate_legal_moves(promo_from, ~board.occupied) if legal is None else
+                          (mv for mv in legal if mv.promotion and not board.is_capture(mv)))
+            for mv in promotions:
+                if mv.promotion == teo_chess.QUEEN and mv not in done:
+                    done.append(mv)
+                    yield mv
+
+        # 3) Killers, apoi counter-move
+        for mv in self.killers[ply] + [self.counter.get(ply)]:
+            if (mv is not None and mv not in done
+                    and not board.is_capture(mv) and board.is_legal(mv)):
+                done.append(mv)
+                yield mv
+
+        # 4) Mutări liniștite, după history
+        ep_square = board.ep_square
+        history = self.history
+        if legal is not None:
+            quiets = [mv for mv in legal if not board.is_capture(mv) and mv not in done]
+        else:
+            quiets = [mv for mv in board.generate_legal_moves(teo_chess.BB_ALL, ~board.occupied_co[not us])
+                      if not (mv.to_square == ep_square and board.is_en_passant(mv)) and mv not in done]
+        quiets.sort(key=lambda mv: history[mv], reverse=True)
+        yield from quiets
+
+        # 5) Capturi proaste
+        yield from bad_captures
+
+    # ── quiescence search ──
+
+    def static_eval(self, board: teo_chess.Board, node: Optional[NodeMoves], ply: int) -> int:
+        """Evaluarea din cache; un mat primește distanța față de rădăcină."""
+        sc = self.eval_cache.evaluate(board, node)
+        return mated_in(ply) if sc == -MATE else sc
+
+    def qsearch_picker(self, board: teo_chess.Board, in_check: bool,
+                       node: Optional[NodeMoves] = None) -> Iterator[teo_chess.Move]:
+        """
+        Mutările din quiescence: în șah toate evitările (capturile primele),
+        altfel doar capturi și promovări, ordonate MVV-LVA. Mutările liniștite
+        nu sunt generate deloc.
+        """
+        legal = node.legal if node is not None and node.generated else None
+        if in_check:
+            # generate_legal_moves trece prin _generate_evasions când regele e în șah
+            moves = legal if legal is not None else list(board.generate_legal_moves())
+            moves = sorted(moves, key=lambda mv: _mvv_lva(board, mv) if board.is_capture(mv) else -1,
+                           reverse=True)
+        elif legal is not None:
+            moves = [mv for mv in legal if mv.promotion or board.is_capture(mv)]
+            moves.sort(key=lambda mv: _mvv_lva(board, mv), reverse=True)
+        else:
+            us = board.turn
+            moves = list(board.generate_legal_captures())
+            promo_from = board.pawns & board.occupied_co[us] & (teo_chess.BB_RANK_7 if us else teo_chess.BB_RANK_2)
+            if promo_from:
+                moves += board.generate_legal_moves(promo_from, ~board.occupied)
+            moves.sort(key=lambda mv: _mvv_lva(board, mv), reverse=True)
+        yield from moves
+
+    def quiesce(self, board: teo_chess.Board, alpha: int, beta: int, depth: int=0, ply: int=0) -> int:
+        self.nodes += 1
+        if not self.nodes & (STOP_CHECK_NODES - 1):
+            self._check_limits()
+        # doar evitările de șah sunt reversibile aici; capturile resetează ceasul
+        if depth and board.is_key_repetition(2):
+            return DRAW_SCORE
+
+        node = NodeMoves(board)
+        stand = self.static_eval(board, node, ply)
+        if depth>=MAX_Q_DEPTH:
+            return stand
+
+        # în șah nu există stand-pat: se caută toate evitările
+        in_check = board.is_check()
+        if not in_check:
+            if stand + FUTILITY_MARGIN*(MAX_Q_DEPTH-depth) < alpha:
+                return stand
+            if stand>alpha:
+                alpha = stand
+
+        searched = False
+        for mv in self.qsearch_picker(board, in_check, node):
+            if not in_check:
+                # delta pruning: nici victima (plus promovarea) nu ajunge la alpha
+                gain = PIECE_VALUES[board.piece_type_at(mv.to_square) or teo_chess.PAWN] if board.is_capture(mv) else 0
+                if mv.promotion:
+                    gain += PIECE_VALUES[mv.promotion] - PIECE_VALUES[teo_chess.PAWN]
+                if stand + gain + DELTA_MARGIN < alpha:
+                    continue
+                # capturi pierzătoare
+                if board.is_capture(mv) and not board.see_ge(mv, 0):
+                    continue
+            searched = True
             board.push(mv)
-            _, sc = negascout(board, depth - MULTI_CUT_REDUCE, -beta, -beta + 1, ply + 1)
+            val = -self.quiesce(board, -beta, -alpha, depth+1, ply+1)
             board.pop()
-            if -sc >= beta:
-                cnt += 1
-                if cnt >= MULTI_CUT_COUNT:
-                    return None, beta
-
-    # ── 3) Transposition Table probe ──
-    prov = _tt_probe(board, depth, alpha, beta)
-    if prov is not None:
-        return None, prov
-
-    # ── 4) Leaf node? ──
-    if depth <= 0:
-        return None, quiesce(board, alpha, beta)
-
-    # ── 5) Null-move pruning ──
-    R = min(NULL_R + 1, max(1, depth // 4))
-    if depth > R + 1 and not board.is_check():
-        board.push(teo_chess.Move.null())
-        _, nm = negascout(board, depth - R - 1, -beta, -beta + 1, ply + 1)
-        board.pop()
-        if -nm >= beta:
-            return None, beta
-
-    best_mv, first = None, True
-    b = beta
-
-    # ── 6) Main move loop ──
-    for i, mv in enumerate(ordered_moves(board, ply)):
-        # 6.a) Hard late-move pruning
-        if (i >= 4
-            and depth >= 3
-            and not board.is_capture(mv)
-            and not board.gives_check(mv)):
-            continue
-
-        board.push(mv)
-        ext = CHECK_EXTENSION if board.is_check() else 0
-
-        # 6.b) Late-move reduction
-        if i > 0 and depth >= 3 and not board.is_capture(mv) and not board.is_check():
-            reduced_depth = depth - 2 + ext
-            _, sc = negascout(board, reduced_depth, -b, -alpha, ply + 1)
-        else:
-            _, sc = negascout(board, depth - 1 + ext, -b, -alpha, ply + 1)
-
-        board.pop()
-        sc = -sc
+            if val>=beta:
+                return beta
+            if val>alpha:
+                alpha = val
+        if in_check and not searched:
+            # nicio evitare: mat, deja evaluat în `stand`
+            return stand
+        return alpha
+
+    # ── negascout (PVS) + null-move + LMR + ext ──
+
+    def negascout(self,
+                  board: teo_chess.Board,
+                  depth: int,
+                  alpha: int,
+                  beta: int,
+                  ply: int = 0
+    ) -> Tuple[Optional[teo_chess.Move], int]:
+        """
+        Principal Variation Search (PVS) cu:
+          - razoring
+          - multi-cut
+          - transposition table probe
+          - null-move pruning
+          - hard late-move pruning
+          - late-move reductions (LMR)
+          - aspiration re-search (în find_best_move)
+          - killer moves, counter moves, history heuristic
+
+        Ridică SearchAborted când o limită e atinsă; apelantul refă tabla.
+        """
+        self.nodes += 1
+        if not self.nodes & (STOP_CHECK_NODES - 1):
+            self._check_limits()
+
+        self.pv[ply] = []
+        if ply >= MAX_PLY - 1:
+            return None, self.static_eval(board, None, ply)
+
+        # ── 0) Remiză: repetiție (cheile Zobrist din stivă) sau 50 de mutări ──
+        if ply > 0:
+            if board.is_key_repetition(2):
+                return None, DRAW_SCORE
+            # matul are prioritate față de regula celor 50 de mutări
+            if board.halfmove_clock >= 100 and (not board.is_check() or any(board.generate_legal_moves())):
+                return None, DRAW_SCORE
+
+            # mate distance pruning: nici cel mai rapid mat nu mai încape în fereastră
+            alpha = max(alpha, mated_in(ply))
+            beta = min(beta, MATE - ply - 1)
+            if alpha >= beta:
+                return None, alpha
+
+        node = NodeMoves(board)
+
+        # ── 1) Razoring ──
+        if ply > 0 and depth in RAZOR_MARGIN:
+            static = self.static_eval(board, node, ply)
+            if static + RAZOR_MARGIN[depth] < alpha:
+                return None, static
+
+        key = _get_key(board)
+        entry = self.tt.probe(key)
+        tt_move = entry.move if entry is not None else None
+
+        # pe varianta principală a iterației anterioare, mutarea din PV e prima
+        pv_line = self.pv_line
+        if ply < len(pv_line) and board.move_stack[self.root_len:] == pv_line[:ply]:
+            tt_move = pv_line[ply]
+
+        # ── 2) Multi-cut ──
+        if depth >= MULTI_CUT_DEPTH and ply > 0:
+            cnt = 0
+            for mv in itertools.islice(self.move_picker(board, ply, tt_move, node), MULTI_CUT_TRY):
+                board.push(mv)
+                _, sc = self.negascout(board, depth - MULTI_CUT_REDUCE, -beta, -beta + 1, ply + 1)
+                board.pop()
+                if -sc >= beta:
+                    cnt += 1
+                    if cnt >= MULTI_CUT_COUNT:
+                        return None, beta
+
+        # ── 3) Transposition Table probe (nu la rădăcină: acolo vrem mutarea și PV-ul) ──
+        prov = self._tt_cutoff(entry, depth, alpha, beta, ply) if ply > 0 and beta - alpha == 1 else None
+        if prov is not None:
+            return None, prov
+
+        # ── 4) Leaf node? ──
+        if depth <= 0:
+            return None, self.quiesce(board, alpha, beta, 0, ply)
+
+        # ── 5) Null-move pruning ──
+        R = min(NULL_R + 1, max(1, depth // 4))
+        # nu două mutări nule la rând
+        if ply > 0 and depth > R + 1 and board.move_stack[-1] and not board.is_check():
+            board.push(teo_chess.Move.null())
+            _, nm = self.negascout(board, depth - R - 1, -beta, -beta + 1, ply + 1)
+            board.pop()
+            if -nm >= beta:
+                return None, beta
+
+        best_mv, first, any_move = None, True, False
+        b = beta
+
+        # ── 6) Main move loop ──
+        for i, mv in enumerate(self.move_picker(board, ply, tt_move, node)):
+            any_move = True
+            # șah dat de mutare, fără push (pruning, extensie, LMR)
+            check = board.gives_check(mv)
+
+            # 6.a) Hard late-move pruning
+            if (i >= 4
+                and depth >= 3
+                and not board.is_capture(mv)
+                and not check):
+                continue
 
-        # 6.c) Principal Variation re-search
-        if not first and alpha < sc < beta:
             board.push(mv)
-            _, sc = negascout(board, depth - 1 + ext, -beta, -alpha, ply + 1)
+            ext = CHECK_EXTENSION if check else 0
+
+            # 6.b) Late-move reduction
+            if i > 0 and depth >= 3 and not board.is_capture(mv) and not check:
+                reduced_depth = depth - 2 + ext
+                _, sc = self.negascout(board, reduced_depth, -b, -alpha, ply + 1)
+            else:
+                _, sc = self.negascout(board, depth - 1 + ext, -b, -alpha, ply + 1)
+
             board.pop()
             sc = -sc
 
-        # 6.d) Update alpha & best move
-        if sc > alpha:
-            alpha, best_mv = sc, mv
-
-        # 6.e) Beta cutoff
-        if alpha >= beta:
-            # store lower-bound in TT
-            _tt_store(board, depth, beta, flag=1, move=mv)
+            # 6.c) Principal Variation re-search
+            if not first and alpha < sc < beta:
+                board.push(mv)
+                _, sc = self.negascout(board, depth - 1 + ext, -beta, -alpha, ply + 1)
+                board.pop()
+                sc = -sc
+
+            # 6.d) Update alpha & best move
+            if sc > alpha:
+                alpha, best_mv = sc, mv
+                self.pv[ply] = [mv] + self.pv[ply + 1]
+                if ply == 0 and self.root_updates and self.on_info is not None \
+                        and sc < beta and self.pv_line and mv != self.pv_line[0]:
+                    self.on_info(self._info(depth, sc, list(self.pv[0]), partial=True))
+
+            # 6.e) Beta cutoff
+            if alpha >= beta:
+                # store lower-bound in TT
+                self.tt.store(key, depth, score_to_tt(beta, ply), 1, mv)
+
+                # counter-move heuristic
+                self.counter[ply] = mv
+
+                # killer moves (păstrează max 4)
+                killers = self.killers[ply]
+                if mv in killers:
+                    killers.remove(mv)
+                killers.insert(0, mv)
+                self.killers[ply] = killers[:4]
+
+                # history heuristic boost
+                self.history[mv] += (depth * depth) * 2
+
+                return best_mv, beta
+
+            first = False
+            b = alpha + 1
+
+        # ── 7) Fără mutări legale: mat sau pat ──
+        if not any_move:
+            return None, mated_in(ply) if board.is_check() else DRAW_SCORE
+
+        # ── 8) No cutoff: exact score, sau upper bound dacă nimic n-a urcat alpha ──
+        if best_mv:
+            self.history[best_mv] += depth * depth
+        self.tt.store(key, depth, score_to_tt(alpha, ply), 0 if best_mv else 2, best_mv)
+        return best_mv, alpha
+
+    # ── iterative deepening + time management ──
+
+    def _deepen(self,
+                board: teo_chess.Board,
+                max_depth:   int,
+                tm:          Optional[TimeManager] = None,
+                worker_id:   int = 0,
+                report:      Optional[Callable[[int, teo_chess.Move, int], None]] = None
+    ) -> Tuple[Optional[teo_chess.Move], int, int]:
+        """
+        Bucla de iterative deepening; întoarce (mutare, scor, adâncime completă).
+        O iterație întreruptă (SearchAborted) e aruncată; rămâne rezultatul
+        ultimei iterații complete. Helperii Lazy SMP (`worker_id` > 0) sar
+        peste adâncimi după `smp_skip_depth`.
+        """
+        best_mv, best_sc, best_depth = None, 0, 0
+        stack_len = self.root_len = len(board.move_stack)
+
+        for depth in range(1, max_depth+1):
+            if self.stop_event.is_set():
+                break
+            if depth > 1 and smp_skip_depth(worker_id, depth, stack_len):
+                continue
 
-            # counter-move heuristic
-            _COUNTER[ply] = mv
+            # alocă buget de timp pentru această adâncime
+            deadline = time.time() + tm.allocate(board) if tm is not None else math.inf
 
-            # killer moves (păstrează max 4)
-            killers = _KILLERS[ply]
-            if mv in killers:
-                killers.remove(mv)
-            killers.insert(0, mv)
-            _KILLERS[ply] = killers[:4]
+            # ferestră de aspirație
+            if abs(best_sc) >= MATE_BOUND:
+                alpha, beta = -INF, INF
+            else:
+                window = max(50, abs(best_sc) // 10)
+                alpha, beta = best_sc - window, best_sc + window
 
-            # history heuristic boost
-            _HISTORY[mv] += (depth * depth) * 2
+            try:
+                # prima căutare în ferestră
+                mv, sc = self.negascout(board, depth, alpha, beta, ply=0)
+                # dacă scapă din ferestră, căutăm full
+                if sc <= alpha or sc >= beta:
+                    mv, sc = self.negascout(board, depth, -INF, INF, ply=0)
+            except SearchAborted:
+                while len(board.move_stack) > stack_len:
+                    board.pop()
+                break
 
-            return best_mv, beta
+            if mv is not None:
+                best_mv, best_sc, best_depth = mv, sc, depth
+                self.depth = depth
+                self.pv_line = list(self.pv[0]) or [mv]
+                self.last_info = self._info(depth, sc, list(self.pv_line))
+                if self.on_info is not None:
+                    self.on_info(self.last_info)
+                if report is not None:
+                    report(depth, mv, sc)
+                # matul găsit în cel mult `depth` semimutări nu se mai schimbă
+                if abs(sc) >= MATE_BOUND and MATE - abs(sc) <= depth:
+                    break
+
+            # dacă am atins sau depășit bugetul de timp, ne oprim
+            if time.time() >= deadline:
+                break
 
-        first = False
-        b = alpha + 1
+        if best_mv is None and worker_id == 0:
+            # întrerupt înainte de prima iterație completă: prima mutare din ordonare
+            moves = self.ordered_moves(board, 0)
+            best_mv = moves[0] if moves else None
+
+        return best_mv, best_sc, best_depth
+
+    def search(self, board: teo_chess.Board, limits: Limits,
+               stop_event: Optional[threading.Event] = None,
+               info: Optional[Callable[[SearchInfo], None]] = None
+    ) -> Tuple[Optional[teo_chess.Move], int]:
+        """
+        Caută cu limitele date. Oprirea (timp dur, noduri, `stop_event` sau
+        `stop()`) e verificată în interiorul iterației, deci latența e plafonată.
+        După fiecare iterație completă se apelează `info(SearchInfo)`.
+        """
+        self.nodes, self.depth, self.start_time = 0, 0, time.time()
+        self.pv_line, self.last_info, self.on_info = [], None, info
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.node_limit = limits.nodes if limits.nodes is not None else math.inf
+        self.tt.new_search()
+        tm = TimeManager(limits.time_left, limits.increment, limits.moves_to_go)
+
+        hard = tm.hard_limit()
+        if limits.movetime is not None:
+            hard = min(hard, limits.movetime)
+        self.deadline = self.start_time + hard
+
+        native = _as_teo_board(board)
+        try:
+            if self.threads > 1:
+                best_mv, best_sc = self._search_smp(native, tm, limits.depth)
+            else:
+                best_mv, best_sc, _ = self._deepen(native, limits.depth, tm)
+        finally:
+            self.deadline, self.node_limit = math.inf, math.inf
+            self.on_info, self.root_updates = None, False
+
+        if best_mv is not None and native is not board:
+            best_mv = board.parse_uci(best_mv.uci())
+        return best_mv, best_sc
+
+    def analyse_iter(self, board: teo_chess.Board, limits: Limits, *,
+                     root_updates: bool = False) -> Iterator[SearchInfo]:
+        """
+        Analiză în flux: căutarea rulează pe un thread separat (pe o copie a
+        tablei) și generatorul dă câte un `SearchInfo` după fiecare adâncime
+        completă; cu `root_updates=True` și la fiecare schimbare a celei mai
+        bune mutări de la rădăcină. Închiderea generatorului (`close()`, `break`)
+        oprește căutarea. Cât timp generatorul e activ, Searcher-ul e ocupat.
+        """
+        infos: "queue.Queue[Optional[SearchInfo]]" = queue.Queue()
+        stop = threading.Event()
+        errors: List[BaseException] = []
+
+        def run() -> None:
+            try:
+                self.root_updates = root_updates
+                self.search(board.copy(), limits, stop, infos.put)
+            except BaseException as err:
+                errors.append(err)
+            finally:
+                infos.put(None)
+
+        worker = threading.Thread(target=run, name="analyse", daemon=True)
+        worker.start()
+        try:
+            while True:
+                info = infos.get()
+                if info is None:
+                    break
+                yield info
+            if errors:
+                raise errors[0]
+        finally:
+            stop.set()
+            worker.join()
+
+    def search_best_move(self,
+                         board: teo_chess.Board,
+                         time_left:  float,
+                         increment:  float,
+                         moves_to_go:int,
+                         max_depth:  int   = 6,
+                         *,
+                         nodes:      Optional[int]   = None,
+                         movetime:   Optional[float] = None,
+                         stop_event: Optional[threading.Event] = None,
+                         info:       Optional[Callable[[SearchInfo], None]] = None
+    ) -> Tuple[Optional[teo_chess.Move], int]:
+        """Iterative deepening cu time management adaptiv."""
+        limits = Limits(time_left, increment, moves_to_go, max_depth, nodes, movetime)
+        return self.search(board, limits, stop_event, info)
+
+    # ── Lazy SMP (procese + TT partajat) ──
+
+    def _search_smp(self, board: teo_chess.Board, tm: TimeManager, max_depth: int
+    ) -> Tuple[Optional[teo_chess.Move], int]:
+        """
+        Lazy SMP: `threads - 1` procese helper caută aceeași rădăcină la adâncimi
+        decalate, toate prin aceeași tabelă de transpoziție partajată. Procesul
+        principal face căutarea cu time management; la final se păstrează
+        rezultatul cu cea mai mare adâncime completă.
+        """
+        root = board.root()
+        moves = [mv.uci() for mv in board.move_stack]
+        stop = multiprocessing.Event()
+        results = multiprocessing.RawArray("d", 3 * self.threads)
+        if self.stop_event.is_set():
+            stop.set()
+        helpers = [multiprocessing.Process(target=_smp_worker,
+                                           args=(i, self.tt, root.fen(), moves, max_depth, stop, results),
+                                           daemon=True)
+                   for i in range(1, self.threads)]
+        for p in helpers:
+            p.start()
+
+        try:
+            best_mv, best_sc, best_depth = self._deepen(board, max_depth, tm)
+        finally:
+            stop.set()
+
+        # helperii verifică `stop` la câteva noduri; cei blocați sunt opriți forțat
+        for p in helpers:
+            p.join(timeout=1.0)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+
+        for i in range(1, self.threads):
+            depth = int(results[3*i + 2])
+            if depth > best_depth:
+                best_mv, best_sc, best_depth = decode_move(int(results[3*i + 1])), int(results[3*i]), depth
+        self.depth = best_depth
+
+        return best_mv, best_sc
+
+
+def _smp_worker(worker_id: int, tt: TranspositionTable, fen: str, moves: List[str],
+                max_depth: int, stop: multiprocessing.synchronize.Event, results) -> None:
+    searcher = Searcher(tt=tt)
+    searcher.stop_event = stop
+    board = teo_chess.Board(fen)
+    for uci in moves:
+        board.push_uci(uci)
+
+    # fără lock: adâncimea se scrie ultima, main citește doar după ce helperul s-a oprit
+    def report(depth: int, mv: teo_chess.Move, sc: int) -> None:
+        results[3*worker_id]     = sc
+        results[3*worker_id + 1] = encode_move(mv)
+        results[3*worker_id + 2] = depth
 
-    # ── 7) No cutoff: exact score ──
-    if best_mv:
-        _HISTORY[best_mv] += depth * depth
-    _tt_store(board, depth, alpha, flag=0, move=best_mv)
-    return best_mv, alpha
+    try:
+        # fiecare helper are propriul program de adâncimi (vezi smp_skip_depth)
+        searcher._deepen(board, max_depth, worker_id=worker_id, report=report)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tt.close()
 
 
 # ——————————————————————————————————————————————————————————
-#               ITERATIVE DEEPENING + TIME MANAGEMENT
+#              API LA NIVEL DE MODUL (SEARCHER IMPLICIT)
 # ——————————————————————————————————————————————————————————
 
+_LOCAL = threading.local()
+
+def default_searcher(threads: int = 1) -> Searcher:
+    """
+    Searcher-ul implicit al thread-ului curent (câte unul per thread).
+    Stă în `threading.local()`, deci dispare odată cu thread-ul; TT-ul lui
+    e închis când obiectul Thread e colectat sau la ieșirea procesului.
+    """
+    searcher = getattr(_LOCAL, "searcher", None)
+    if searcher is None:
+        searcher = _LOCAL.searcher = Searcher(threads=threads)
+        weakref.finalize(threading.current_thread(), searcher.close)
+    elif searcher.threads != threads:
+        searcher.set_threads(threads)
+    return searcher
+
 def search_best_move(board: teo_chess.Board,
                      time_left:  float,
                      increment:  float,
                      moves_to_go:int,
-                     max_depth:  int   = 6
-) -> Tuple[Optional[teo_chess.Move], float]:
+                     max_depth:  int   = 6,
+                     threads:    int   = 1,
+                     *,
+                     nodes:      Optional[int]   = None,
+                     movetime:   Optional[float] = None,
+                     stop_event: Optional[threading.Event] = None,
+                     info:       Optional[Callable[[SearchInfo], None]] = None
+) -> Tuple[Optional[teo_chess.Move], int]:
     """Iterative deepening cu time management adaptiv."""
-    tm = TimeManager(time_left, increment, moves_to_go)
-    best_mv, best_sc = None, 0.0
-
-    for depth in range(1, max_depth+1):
-        # alocă buget de timp pentru această adâncime
-        alloc = tm.allocate(board)
-        deadline = time.time() + alloc
+    return default_searcher(threads).search_best_move(board, time_left, increment, moves_to_go, max_depth,
+                                                      nodes=nodes, movetime=movetime, stop_event=stop_event,
+                                                      info=info)
 
-        # ferestră de aspirație
-        window = max(50, abs(best_sc)*0.1)
-        alpha, beta = best_sc - window, best_sc + window
-
-        # prima căutare în ferestră
-        mv, sc = negascout(board, depth, alpha, beta, ply=0)
-        # dacă scapă din ferestră, căutăm full
-        if sc <= alpha or sc >= beta:
-            mv, sc = negascout(board, depth, -math.inf, math.inf, ply=0)
-
-        if mv is not None:
-            best_mv, best_sc = mv, sc
-
-        # dacă am atins sau depășit bugetul de timp, ne oprim
-        if time.time() >= deadline:
-            break
-
-    return best_mv, best_sc
+def reset_search() -> None:
+    """Golește tabelele searcher-ului implicit, fără să-i schimbe numărul de thread-uri."""
+    searcher = getattr(_LOCAL, "searcher", None)
+    if searcher is not None:
+        searcher.reset()
+
+
+# Poziții de referință pentru măsurători (time-to-depth)
+BENCH_FENS = [
+    teo_chess.STARTING_FEN,
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
 
+def bench(depth: int = 4, threads: int = 1) -> float:
+    """Timpul total până la adâncimea `depth` pe BENCH_FENS."""
+    searcher = Searcher(threads=threads)
+    start = time.time()
+    try:
+        for fen in BENCH_FENS:
+            searcher.reset()
+            board = teo_chess.Board(fen)
+            mv, sc = searcher.search_best_move(board, math.inf, 0.0, 1, max_depth=depth)
+            st = searcher.stats()
+            print(f"{fen:<72} {mv} {sc:9d} {st['nodes']:9d} nodes {st['time']:7.2f}s"
+                  f" eval hits {st['eval_hits']}/{st['eval_hits'] + st['eval_misses']}")
+    finally:
+        searcher.close()
+    total = time.time() - start
+    print(f"depth {depth}, threads {threads}: {total:.2f}s")
+    return total
 
 
 # ——————————————————————————————————————————————————————————
 #                    OPENING‐BOOK FALLBACK
 # ——————————————————————————————————————————————————————————
 
-def opening_move(board: teo_chess.Board) -> Tuple[Optional[teo_chess.Move], float]:
-    try:
-        with teo_chess.polyglot.open_reader("pwned.polyglot.bin") as reader:
-            return reader.weighted_choice(board).move, 0.0
-    except:
-        # pentru test: 5s total, 0.2s increment, ~40 mutări până la control
-        return search_best_move(board,
-                                time_left=5.0,
-                                increment=0.2,
-                                moves_to_go=40,
-                                max_depth=4)
+BOOK_PATH    = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Perfect2017.bin")
+BOOK_MAX_PLY = 20   # după atâtea semimutări cartea nu mai e consultată
+
+class OpeningBook:
+    """
+    Carte de deschideri polyglot citită o singură dată în memorie, indexată
+    după cheia Zobrist: un probe costă un hash al poziției și o căutare în
+    dicționar. Un fișier lipsă dă o carte goală (fără excepții la fiecare mutare).
+
+    Cât timp partida e în carte, tabla primește hasher-ul polyglot incremental
+    (cheia se actualizează la push/pop); după `max_ply` e detașat, ca să nu
+    coste nimic în căutare.
+    """
+
+    def __init__(self, path: Optional[str] = BOOK_PATH, max_ply: int = BOOK_MAX_PLY) -> None:
+        self.path = path
+        self.max_ply = max_ply
+        # cheie -> intrări cu greutate nenulă, în ordinea din fișier
+        self.index: Dict[int, List[teo_chess.polyglot.Entry]] = {}
+        if path is None:
+            return
+        try:
+            with teo_chess.polyglot.open_reader(path) as reader:
+                for entry in reader:
+                    if entry.weight:
+                        self.index.setdefault(entry.key, []).append(entry)
+        except OSError:
+            pass
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.index.values())
+
+    def __bool__(self) -> bool:
+        return bool(self.index)
+
+    def probe(self, board: teo_chess.Board) -> List[Tuple[teo_chess.Move, int]]:
+        """Mutările legale din carte pentru poziția dată, cu greutățile lor."""
+        hasher = teo_chess.polyglot.POLYGLOT_HASHER
+        ply = 2 * (board.fullmove_number - 1) + (board.turn == teo_chess.BLACK)
+        if ply >= self.max_ply or not self.index:
+            hasher.detach(board)
+            return []
+        if not hasher.is_attached(board):
+            hasher.attach(board)
+        entries = self.index.get(teo_chess.polyglot.zobrist_hash(board))
+        if not entries:
+            return []
+        moves = []
+        for entry in entries:
+            # rocada e codificată rege-ia-tura (e1h1)
+            mv = board._from_chess960(board.chess960, entry.move.from_square, entry.move.to_square,
+                                      entry.move.promotion, entry.move.drop)
+            if board.is_legal(mv):
+                moves.append((mv, entry.weight))
+        return moves
+
+    def learn(self, board: teo_chess.Board, result: Optional[str] = None,
+              color: Optional[teo_chess.Color] = None) -> int:
+        """
+        Învățare din partida terminată `board`: greutățile/learn ale mutărilor
+        din carte sunt actualizate direct în fișier (prin mmap, fără rescriere)
+        și în index. Întoarce numărul de intrări actualizate.
+        """
+        if self.path is None or not self.index:
+            return 0
+        with teo_chess.polyglot.open_reader(self.path, writable=True) as book:
+            updated = book.learn_game(board, result, color=color, max_ply=self.max_ply)
+        for entry in updated:
+            self.index[entry.key] = [entry if old.raw_move == entry.raw_move else old
+                                     for old in self.index.get(entry.key, [])]
+        return len(updated)
+
+    def weighted_choice(self, board: teo_chess.Board, *, random=random) -> Optional[teo_chess.Move]:
+        moves = self.probe(board)
+        if not moves:
+            return None
+        choice = random.randrange(sum(weight for _, weight in moves))
+        for mv, weight in moves:
+            choice -= weight
+            if choice < 0:
+                return mv
+        return None
+
+
+_BOOK: Optional[OpeningBook] = None
+
+def load_book(path: Optional[str] = BOOK_PATH, max_ply: int = BOOK_MAX_PLY) -> OpeningBook:
+    """Încarcă (sau schimbă) cartea folosită de `opening_move`; `path=None` o dezactivează."""
+    global _BOOK
+    _BOOK = OpeningBook(path, max_ply)
+    return _BOOK
+
+def opening_book() -> OpeningBook:
+    """Cartea procesului, încărcată la primul apel."""
+    return _BOOK if _BOOK is not None else load_book()
+
+def learn_from_game(board: teo_chess.Board, color: Optional[teo_chess.Color] = None,
+                    book: Optional[OpeningBook] = None) -> int:
+    """
+    Hook de final de partidă: dacă `board` e o partidă terminată, actualizează
+    cartea (implicit `opening_book()`) cu rezultatul ei, doar pentru mutările
+    lui `color` (motorul) dacă e dat. Apelat din `main()` și din UCI
+    (cu `--learn-book`) și din UCI (opțiunea BookLearning, la `ucinewgame`/`quit`).
+    """
+    if board.result() == "*":
+        return 0
+    return (book if book is not None else opening_book()).learn(board, color=color)
+
+def opening_move(board: teo_chess.Board) -> Tuple[Optional[teo_chess.Move], int]:
+    mv = opening_book().weighted_choice(board)
+    if mv is not None:
+        return mv, 0
+    # pentru test: 5s total, 0.2s increment, ~40 mutări până la control
+    return search_best_move(board,
+                            time_left=5.0,
+                            increment=0.2,
+                            moves_to_go=40,
+                            max_depth=4)
 
 
 # ——————————————————————————————————————————————————————————
 #                         CLI MAIN PENTRU TESTARE
 # ——————————————————————————————————————————————————————————
 
-def main() -> None:
+def main(learn_book: Optional[str] = None) -> None:
+    """
+    Partidă în consolă (albul = utilizatorul). Învățarea din carte e opțională:
+    cu `learn_book`, cartea din acel fișier e folosită și actualizată la final;
+    fără, BOOK_PATH nu e modificată.
+    """
+    if learn_book is not None:
+        load_book(learn_book)
     board = teo_chess.Board()
     print(board.unicode(borders=True), "\n")
     while not board.is_game_over():
@@ -712,12 +1676,15 @@ def main() -> None:
             board.push(mv)
         print(board.unicode(borders=True), "\n")
     print("Game over:", board.result())
-
-def reset_search() -> None:
-    global _TT, _KILLERS, _HISTORY
-    _TT = [None] * _TT_SIZE
-    _KILLERS.clear()
-    _HISTORY.clear()
+    if learn_book is not None:
+        learn_from_game(board, color=teo_chess.BLACK)
 
 if __name__=="__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        # python engine.py bench [depth] [threads]
+        bench(*(int(arg) for arg in sys.argv[2:4]))
+    elif len(sys.argv) > 2 and sys.argv[1] == "--learn-book":
+        # python engine.py --learn-book carte.bin
+        main(sys.argv[2])
+    else:
+        main()
@@ -48,6 +48,9 @@ PIECE_TYPES = [PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING] = range(1, 7)
 PIECE_SYMBOLS = [None, "p", "n", "b", "r", "q", "k"]
 PIECE_NAMES = [None, "pawn", "knight", "bishop", "rook", "queen", "king"]
 
+# Piece values by piece type, as used by static exchange evaluation.
+SEE_VALUES = [0, 100, 320, 330, 500, 900, 20000]
+
 def piece_symbol(piece_type: PieceType, _PIECE_SYMBOLS: List[Optional[str]] = PIECE_SYMBOLS) -> str:
     return typing.cast(str, _PIECE_SYMBOLS[piece_type])
 
@@ -222,6 +225,10 @@ def scan_reversed(bb: Bitboard, *, _BB_SQUARES: List[Bitboard] = BB_SQUARES) ->
 def popcount(bb: Bitboard, *, _bin: Callable[[int], str] = bin) -> int:
     return _bin(bb).count("1")
 
+if hasattr(int, "bit_count"):
+    # Python 3.10+: native popcount
+    popcount = int.bit_count  # type: ignore[assignment] # noqa: F811
+
 def flip_vertical(bb: Bitboard) -> Bitboard:
     # https://www.chessprogramming.org/Flipping_Mirroring_and_Rotating#FlipVertically
     bb = ((bb >> 8) & 0x00ff_00ff_00ff_00ff) | ((bb & 0x00ff_00ff_00ff_00ff) << 8)
@@ -293,6 +300,20 @@ def shift_down_left(b: Bitboard) -> Bitboard:
 def shift_down_right(b: Bitboard) -> Bitboard:
     return (b >> 7) & ~BB_FILE_A
 
+def fill_up(b: Bitboard) -> Bitboard:
+    """The squares of *b* and all squares above them on the same file."""
+    b |= b << 8
+    b |= b << 16
+    b |= b << 32
+    return b & BB_ALL
+
+def fill_down(b: Bitboard) -> Bitboard:
+    """The squares of *b* and all squares below them on the same file."""
+    b |= b >> 8
+    b |= b >> 16
+    b |= b >> 32
+    return b
+
 
 def _sliding_attacks(square: Square, occupied: Bitboard, deltas: Iterable[int]) -> Bitboard:
     attacks = BB_EMPTY
@@ -380,6 +401,125 @@ def _rays() -> Tuple[List[List[Bitboard]], List[List[Bitboard]]]:
 BB_RAYS, BB_BETWEEN = _rays()
 
 
+def _evaluation_masks() -> Tuple[List[List[Bitboard]], List[Bitboard], List[List[Bitboard]]]:
+    def ranks(first: int, last: int) -> Bitboard:
+        bb = BB_EMPTY
+        for rank in range(max(0, first), min(7, last) + 1):
+            bb |= BB_RANKS[rank]
+        return bb
+
+    adjacent_files = [(BB_FILES[file - 1] if file > 0 else BB_EMPTY) | (BB_FILES[file + 1] if file < 7 else BB_EMPTY) for file in range(8)]
+
+    forward_file: List[List[Bitboard]] = [[], []]
+    king_shield: List[List[Bitboard]] = [[], []]
+    for square in SQUARES:
+        file, rank = square_file(square), square_rank(square)
+        files = BB_FILES[file] | adjacent_files[file]
+        forward_file[WHITE].append(BB_FILES[file] & ranks(rank + 1, 7))
+        forward_file[BLACK].append(BB_FILES[file] & ranks(0, rank - 1))
+        king_shield[WHITE].append(files & ranks(rank + 1, rank + 3))
+        king_shield[BLACK].append(files & ranks(rank - 3, rank - 1))
+    return forward_file, adjacent_files, king_shield
+
+# Masks for evaluation terms. BB_FORWARD_FILE[color][square]: squares in
+# front of the square on the same file, from the point of view of color.
+# BB_ADJACENT_FILES[file]: the neighbouring files. BB_KING_SHIELD[color][square]:
+# the (up to) three files around the square, on the three ranks in front of it.
+BB_FORWARD_FILE, BB_ADJACENT_FILES, BB_KING_SHIELD = _evaluation_masks()
+
+
+def _zobrist_randoms(count: int, seed: int = 0x9E3779B97F4A7C15) -> List[int]:
+    # Deterministic splitmix64 sequence, so that keys are stable across
+    # processes (and can be shared between them).
+    randoms = []
+    state = seed
+    for _ in range(count):
+        state = (state + 0x9E3779B97F4A7C15) & BB_ALL
+        z = state
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & BB_ALL
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & BB_ALL
+        randoms.append(z ^ (z >> 31))
+    return randoms
+
+_ZOBRIST_RANDOMS = _zobrist_randoms(14 * 64 + 64 + 8 + 1)
+
+# Indexed by (piece_type << 7) | (color << 6) | square.
+ZOBRIST_PIECES = _ZOBRIST_RANDOMS[:14 * 64]
+ZOBRIST_CASTLING = _ZOBRIST_RANDOMS[14 * 64:15 * 64]
+ZOBRIST_EP = _ZOBRIST_RANDOMS[15 * 64:15 * 64 + 8]
+ZOBRIST_TURN = _ZOBRIST_RANDOMS[15 * 64 + 8]
+
+_ZOBRIST_CASTLING_CACHE: Dict[Bitboard, int] = {}
+
+def _zobrist_castling(castling_rights: Bitboard) -> int:
+    try:
+        return _ZOBRIST_CASTLING_CACHE[castling_rights]
+    except KeyError:
+        key = 0
+        for square in scan_reversed(castling_rights & BB_BACKRANKS):
+            key ^= ZOBRIST_CASTLING[square]
+        _ZOBRIST_CASTLING_CACHE[castling_rights] = key
+        return key
+
+
+class PieceSquareTables:
+    """
+    Weights for the incremental evaluation accumulator of a board. See
+    :func:`BaseBoard.set_psqt() <chess.BaseBoard.set_psqt>`.
+
+    *mg* and *eg* map piece types to 64 middlegame and endgame values
+    (usually material plus piece-square bonus) from White's point of view,
+    indexed by square. Black's values are mirrored vertically and counted
+    negatively. *eg* defaults to *mg*. *phase* maps piece types to game
+    phase weights, which are summed for both colors.
+    """
+
+    def __init__(self, mg: Mapping[PieceType, typing.Sequence[int]], eg: Optional[Mapping[PieceType, typing.Sequence[int]]] = None, phase: Optional[Mapping[PieceType, int]] = None) -> None:
+        # Indexed by (piece_type << 7) | (color << 6) | square, like
+        # ZOBRIST_PIECES.
+        self.mg = self._expand(mg)
+        self.eg = self._expand(mg if eg is None else eg)
+        self.phase = [0] * 7
+        for piece_type, weight in (phase or {}).items():
+            self.phase[piece_type] = weight
+
+    @staticmethod
+    def _expand(tables: Mapping[PieceType, typing.Sequence[int]]) -> List[int]:
+        expanded = [0] * (7 << 7)
+        for piece_type, table in tables.items():
+            for square in SQUARES:
+                expanded[piece_type << 7 | WHITE << 6 | square] = table[square]
+                expanded[piece_type << 7 | BLACK << 6 | square_mirror(square)] = -table[square]
+        return expanded
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} at {id(self):#x}>"
+
+def _psqt_sums(psqt: Optional[PieceSquareTables], masks: Tuple[Bitboard, ...], occupied_white: Bitboard) -> Tuple[int, int, int]:
+    # Full recomputation of the accumulator from piece masks (pawns through
+    # kings). Piece moves keep it up to date incrementally.
+    mg = eg = phase = 0
+    if psqt is not None:
+        for piece_type, mask in zip(PIECE_TYPES, masks):
+            for square in scan_reversed(mask):
+                index = piece_type << 7 | bool(occupied_white & BB_SQUARES[square]) << 6 | square
+                mg += psqt.mg[index]
+                eg += psqt.eg[index]
+                phase += psqt.phase[piece_type]
+    return mg, eg, phase
+
+
+def _zobrist_table_sum(table: Optional[typing.Sequence[int]], masks: Tuple[Bitboard, ...], occupied_white: Bitboard) -> int:
+    # Full recomputation of the key of an attached Zobrist table from piece
+    # masks (pawns through kings).
+    key = 0
+    if table is not None:
+        for piece_type, mask in zip(PIECE_TYPES, masks):
+            for square in scan_reversed(mask):
+                key ^= table[piece_type << 7 | bool(occupied_white & BB_SQUARES[square]) << 6 | square]
+    return key
+
+
 SAN_REGEX = re.compile(r"^([NBKRQ])?([a-h])?([1-8])?[\-x]?([a-h][1-8])(=?[nbrqkNBRQK])?(\+|#)?\Z")
 
 FEN_CASTLING_REGEX = re.compile(r"^(?:-|[KQABCDEFGH]{0,2}[kqabcdefgh]{0,2})\Z")
@@ -547,6 +687,8 @@ class BaseBoard:
 
     def __init__(self, board_fen: Optional[str] = STARTING_BOARD_FEN) -> None:
         self.occupied_co = [BB_EMPTY, BB_EMPTY]
+        self._psqt: Optional[PieceSquareTables] = None
+        self._zobrist_table: Optional[typing.Sequence[int]] = None
 
         if board_fen is None:
             self._clear_board()
@@ -569,6 +711,10 @@ class BaseBoard:
         self.occupied_co[BLACK] = BB_RANK_7 | BB_RANK_8
         self.occupied = BB_RANK_1 | BB_RANK_2 | BB_RANK_7 | BB_RANK_8
 
+        self._zobrist, self._pawn_zobrist = self._zobrist_pieces()
+        self._psqt_refresh()
+        self._zobrist_table_refresh()
+
     def reset_board(self) -> None:
         self._reset_board()
 
@@ -586,6 +732,10 @@ class BaseBoard:
         self.occupied_co[BLACK] = BB_EMPTY
         self.occupied = BB_EMPTY
 
+        self._zobrist = self._pawn_zobrist = 0
+        self._psqt_mg = self._psqt_eg = self._psqt_phase = 0
+        self._zobrist_table_key = 0
+
     def clear_board(self) -> None:
         """Clears the board."""
         self._clear_board()
@@ -606,6 +756,87 @@ class BaseBoard:
 
         return bb & self.occupied_co[color]
 
+    def _zobrist_pieces(self) -> Tuple[int, int]:
+        # Full recomputation of the piece-square part of the Zobrist key and
+        # of the pawns-only key. Piece moves keep them up to date
+        # incrementally.
+        key = pawn_key = 0
+        for color in COLORS:
+            for piece_type in PIECE_TYPES:
+                for square in scan_reversed(self.pieces_mask(piece_type, color)):
+                    key ^= ZOBRIST_PIECES[piece_type << 7 | color << 6 | square]
+            for square in scan_reversed(self.pieces_mask(PAWN, color)):
+                pawn_key ^= ZOBRIST_PIECES[PAWN << 7 | color << 6 | square]
+        return key, pawn_key
+
+    def pawn_key(self) -> int:
+        """
+        Gets a 64-bit Zobrist key of the pawn placement only (e.g. for a
+        pawn structure hash table).
+
+        It is maintained incrementally, so this is a constant time operation.
+        """
+        return self._pawn_zobrist
+
+    def _psqt_refresh(self) -> None:
+        self._psqt_mg, self._psqt_eg, self._psqt_phase = _psqt_sums(
+            self._psqt, (self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings), self.occupied_co[WHITE])
+
+    @property
+    def psqt(self) -> Optional[PieceSquareTables]:
+        """The attached :class:`~chess.PieceSquareTables`, or ``None``."""
+        return self._psqt
+
+    def set_psqt(self, psqt: Optional[PieceSquareTables]) -> None:
+        """
+        Attaches :class:`~chess.PieceSquareTables` to the board (or detaches
+        them with ``None``).
+
+        While attached, the middlegame and endgame sums and the game phase
+        are kept up to date as pieces are moved, so that
+        :func:`~chess.BaseBoard.psqt_score()` is cheap.
+        """
+        self._psqt = psqt
+        self._psqt_refresh()
+
+    def psqt_score(self) -> Tuple[int, int, int]:
+        """
+        Gets the ``(mg, eg, phase)`` sums of the attached
+        :class:`~chess.PieceSquareTables`. Scores are from White's point of
+        view. All zero if no tables are attached.
+        """
+        return self._psqt_mg, self._psqt_eg, self._psqt_phase
+
+    def _zobrist_table_refresh(self) -> None:
+        self._zobrist_table_key = _zobrist_table_sum(
+            self._zobrist_table, (self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings), self.occupied_co[WHITE])
+
+    @property
+    def zobrist_table(self) -> Optional[typing.Sequence[int]]:
+        """The attached Zobrist table, or ``None``."""
+        return self._zobrist_table
+
+    def set_zobrist_table(self, table: Optional[typing.Sequence[int]]) -> None:
+        """
+        Attaches an additional table of piece-square Zobrist keys to the
+        board (or detaches it with ``None``). The table is indexed by
+        ``piece_type << 7 | color << 6 | square``, like the board's own keys.
+
+        While attached, the XOR of the keys of all pieces is kept up to date
+        as pieces are moved, so that
+        :func:`~chess.BaseBoard.zobrist_table_key()` is a constant time
+        operation. This is used by :class:`chess.polyglot.ZobristHasher`.
+        """
+        self._zobrist_table = table
+        self._zobrist_table_refresh()
+
+    def zobrist_table_key(self) -> int:
+        """
+        Gets the piece placement key of the attached Zobrist table, or ``0``
+        if no table is attached.
+        """
+        return self._zobrist_table_key
+
     def pieces(self, piece_type: PieceType, color: Color) -> "SquareSet":
         """
         Gets pieces of the given type and color.
@@ -683,6 +914,28 @@ class BaseBoard:
                             BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & self.occupied])
             return attacks
 
+    def attacked_mask(self, color: Color) -> Bitboard:
+        """
+        Gets the set of squares attacked by *color* (the union of
+        :func:`~chess.BaseBoard.attacks_mask()` over its pieces).
+        """
+        our = self.occupied_co[color]
+        pawns = self.pawns & our
+        if color == WHITE:
+            attacked = shift_up_left(pawns) | shift_up_right(pawns)
+        else:
+            attacked = shift_down_left(pawns) | shift_down_right(pawns)
+        for square in scan_reversed(self.knights & our):
+            attacked |= BB_KNIGHT_ATTACKS[square]
+        for square in scan_reversed(self.kings & our):
+            attacked |= BB_KING_ATTACKS[square]
+        for square in scan_reversed((self.bishops | self.queens) & our):
+            attacked |= BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & self.occupied]
+        for square in scan_reversed((self.rooks | self.queens) & our):
+            attacked |= (BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & self.occupied] |
+                         BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & self.occupied])
+        return attacked
+
     def attacks(self, square: Square) -> "SquareSet":
         """
         Gets the set of attacked squares from the given square.
@@ -793,6 +1046,7 @@ class BaseBoard:
     def _remove_piece_at(self, square: Square) -> Optional[PieceType]:
         piece_type = self.piece_type_at(square)
         mask = BB_SQUARES[square]
+        color = bool(self.occupied_co[WHITE] & mask)
 
         if piece_type == PAWN:
             self.pawns ^= mask
@@ -815,6 +1069,21 @@ class BaseBoard:
 
         self.promoted &= ~mask
 
+        index = piece_type << 7 | color << 6 | square
+        self._zobrist ^= ZOBRIST_PIECES[index]
+        if piece_type == PAWN:
+            self._pawn_zobrist ^= ZOBRIST_PIECES[index]
+
+        table = self._zobrist_table
+        if table is not None:
+            self._zobrist_table_key ^= table[index]
+
+        psqt = self._psqt
+        if psqt is not None:
+            self._psqt_mg -= psqt.mg[index]
+            self._psqt_eg -= psqt.eg[index]
+            self._psqt_phase -= psqt.phase[piece_type]
+
         return piece_type
 
     def remove_piece_at(self, square: Square) -> Optional[Piece]:
@@ -852,6 +1121,21 @@ class BaseBoard:
         if promoted:
             self.promoted ^= mask
 
+        index = piece_type << 7 | color << 6 | square
+        self._zobrist ^= ZOBRIST_PIECES[index]
+        if piece_type == PAWN:
+            self._pawn_zobrist ^= ZOBRIST_PIECES[index]
+
+        table = self._zobrist_table
+        if table is not None:
+            self._zobrist_table_key ^= table[index]
+
+        psqt = self._psqt
+        if psqt is not None:
+            self._psqt_mg += psqt.mg[index]
+            self._psqt_eg += psqt.eg[index]
+            self._psqt_phase += psqt.phase[piece_type]
+
     def set_piece_at(self, square: Square, piece: Optional[Piece], promoted: bool = False) -> None:
         """
         Sets a piece at the given square.
@@ -1038,6 +1322,10 @@ class BaseBoard:
         self.occupied = BB_RANK_1 | BB_RANK_2 | BB_RANK_7 | BB_RANK_8
         self.promoted = BB_EMPTY
 
+        self._zobrist, self._pawn_zobrist = self._zobrist_pieces()
+        self._psqt_refresh()
+        self._zobrist_table_refresh()
+
     def set_chess960_pos(self, sharnagl: int) -> None:
         """
         Sets up a Chess960 starting position given its index between 0 and 959.
@@ -1229,6 +1517,10 @@ class BaseBoard:
         self.occupied = f(self.occupied)
         self.promoted = f(self.promoted)
 
+        self._zobrist, self._pawn_zobrist = self._zobrist_pieces()
+        self._psqt_refresh()
+        self._zobrist_table_refresh()
+
     def transform(self: BaseBoardT, f: Callable[[Bitboard], Bitboard]) -> BaseBoardT:
         board = self.copy()
         board.apply_transform(f)
@@ -1243,6 +1535,9 @@ class BaseBoard:
         """
         board = self.transform(flip_vertical)
         board.occupied_co[WHITE], board.occupied_co[BLACK] = board.occupied_co[BLACK], board.occupied_co[WHITE]
+        board._zobrist, board._pawn_zobrist = board._zobrist_pieces()
+        board._psqt_refresh()
+        board._zobrist_table_refresh()
         return board
 
     def copy(self: BaseBoardT) -> BaseBoardT:
@@ -1261,6 +1556,15 @@ class BaseBoard:
         board.occupied = self.occupied
         board.promoted = self.promoted
 
+        board._zobrist = self._zobrist
+        board._pawn_zobrist = self._pawn_zobrist
+        board._psqt = self._psqt
+        board._psqt_mg = self._psqt_mg
+        board._psqt_eg = self._psqt_eg
+        board._psqt_phase = self._psqt_phase
+        board._zobrist_table = self._zobrist_table
+        board._zobrist_table_key = self._zobrist_table_key
+
         return board
 
     def __copy__(self: BaseBoardT) -> BaseBoardT:
@@ -1311,6 +1615,12 @@ class _BoardState(Generic[BoardT]):
         self.occupied = board.occupied
 
         self.promoted = board.promoted
+        self.zobrist = board._zobrist
+        self.pawn_zobrist = board._pawn_zobrist
+        self.psqt_mg = board._psqt_mg
+        self.psqt_eg = board._psqt_eg
+        self.psqt_phase = board._psqt_phase
+        self.zobrist_table_key = board._zobrist_table_key
 
         self.turn = board.turn
         self.castling_rights = board.castling_rights
@@ -1318,6 +1628,7 @@ class _BoardState(Generic[BoardT]):
         self.halfmove_clock = board.halfmove_clock
         self.fullmove_number = board.fullmove_number
 
+
     def restore(self, board: BoardT) -> None:
         board.pawns = self.pawns
         board.knights = self.knights
@@ -1331,6 +1642,12 @@ class _BoardState(Generic[BoardT]):
         board.occupied = self.occupied
 
         board.promoted = self.promoted
+        board._zobrist = self.zobrist
+        board._pawn_zobrist = self.pawn_zobrist
+        board._psqt_mg = self.psqt_mg
+        board._psqt_eg = self.psqt_eg
+        board._psqt_phase = self.psqt_phase
+        board._zobrist_table_key = self.zobrist_table_key
 
         board.turn = self.turn
         board.castling_rights = self.castling_rights
@@ -1443,10 +1760,38 @@ class Board(BaseBoard):
         del self.move_stack[:]
         del self._stack[:]
 
+    def set_psqt(self, psqt: Optional[PieceSquareTables]) -> None:
+        super().set_psqt(psqt)
+
+        # Recompute the accumulator of positions on the stack, so that it
+        # is restored correctly when popping moves. States may be shared
+        # with copies of the board, so they are replaced, not modified.
+        stack = []
+        for state in self._stack:
+            state = copy.copy(state)
+            state.psqt_mg, state.psqt_eg, state.psqt_phase = _psqt_sums(
+                psqt, (state.pawns, state.knights, state.bishops, state.rooks, state.queens, state.kings), state.occupied_w)
+            stack.append(state)
+        self._stack = stack
+
+    def set_zobrist_table(self, table: Optional[typing.Sequence[int]]) -> None:
+        super().set_zobrist_table(table)
+
+        # Like set_psqt(): recompute the key of positions on the stack.
+        stack = []
+        for state in self._stack:
+            state = copy.copy(state)
+            state.zobrist_table_key = _zobrist_table_sum(
+                table, (state.pawns, state.knights, state.bishops, state.rooks, state.queens, state.kings), state.occupied_w)
+            stack.append(state)
+        self._stack = stack
+
     def root(self: BoardT) -> BoardT:
         """Returns a copy of the root position."""
         if self._stack:
             board = type(self)(None, chess960=self.chess960)
+            board._psqt = self._psqt
+            board._zobrist_table = self._zobrist_table
             self._stack[0].restore(board)
             return board
         else:
@@ -1575,6 +1920,93 @@ class Board(BaseBoard):
 
         return not self._is_safe(king, self._slider_blockers(king), move)
 
+    def gives_check(self, move: Move) -> bool:
+        """
+        Probes if the given move would put the opponent in check. The move
+        must be at least pseudo-legal.
+
+        The move is not made: direct checks are looked up in the squares from
+        which the moved (or promoted) piece would attack the enemy king, and
+        discovered checks are only considered if the move uncovers a line to
+        the king. Castling and en passant are handled.
+        """
+        if not move:
+            return False
+
+        us = self.turn
+        king = self.king(not us)
+        if king is None:
+            return False
+
+        if move.drop:
+            from_mask = BB_EMPTY
+            piece_type: Optional[PieceType] = move.drop
+        else:
+            from_mask = BB_SQUARES[move.from_square]
+            piece_type = self.piece_type_at(move.from_square)
+            if piece_type == KING and self.is_castling(move):
+                return self._castling_gives_check(move, king)
+        to_mask = BB_SQUARES[move.to_square]
+
+        occupied = (self.occupied & ~from_mask) | to_mask
+        en_passant = piece_type == PAWN and self.is_en_passant(move)
+        if en_passant:
+            occupied &= ~BB_SQUARES[move.to_square + (-8 if us == WHITE else 8)]
+
+        # Direct check: the piece lands on one of the checking squares of its
+        # type. Slider checking squares are taken with the occupancy after the
+        # move, which accounts for promotions vacating the line.
+        if move.promotion:
+            piece_type = move.promotion
+        if piece_type == PAWN:
+            if BB_PAWN_ATTACKS[not us][king] & to_mask:
+                return True
+        elif piece_type == KNIGHT:
+            if BB_KNIGHT_ATTACKS[king] & to_mask:
+                return True
+        elif piece_type != KING:
+            if piece_type != ROOK and BB_DIAG_ATTACKS[king][BB_DIAG_MASKS[king] & occupied] & to_mask:
+                return True
+            if piece_type != BISHOP and (BB_RANK_ATTACKS[king][BB_RANK_MASKS[king] & occupied] |
+                                         BB_FILE_ATTACKS[king][BB_FILE_MASKS[king] & occupied]) & to_mask:
+                return True
+
+        # Discovered check: only possible if the moved piece (or the pawn
+        # captured en passant) was on a line through the king, and did not
+        # stay on it.
+        line = BB_RAYS[king][move.from_square]
+        if not en_passant and not (line & from_mask and not line & to_mask):
+            return False
+        return self._sliders_check(king, occupied, self.occupied_co[us] & ~from_mask)
+
+    def _sliders_check(self, king: Square, occupied: Bitboard, ours: Bitboard) -> bool:
+        # Do our sliders (restricted to the given mask) attack the king with
+        # the given occupancy?
+        if BB_DIAG_ATTACKS[king][BB_DIAG_MASKS[king] & occupied] & (self.bishops | self.queens) & ours:
+            return True
+        return bool((BB_RANK_ATTACKS[king][BB_RANK_MASKS[king] & occupied] |
+                     BB_FILE_ATTACKS[king][BB_FILE_MASKS[king] & occupied]) & (self.rooks | self.queens) & ours)
+
+    def _castling_gives_check(self, move: Move, king: Square) -> bool:
+        move = self._to_chess960(move)
+        rank = BB_RANK_1 if self.turn == WHITE else BB_RANK_8
+        king_from = BB_SQUARES[move.from_square]
+        rook_from = BB_SQUARES[move.to_square]
+        if move.to_square < move.from_square:
+            king_to, rook_to = BB_FILE_C & rank, BB_FILE_D & rank
+        else:
+            king_to, rook_to = BB_FILE_G & rank, BB_FILE_F & rank
+
+        occupied = (self.occupied & ~king_from & ~rook_from) | king_to | rook_to
+
+        # The castled rook gives a direct check.
+        if (BB_RANK_ATTACKS[king][BB_RANK_MASKS[king] & occupied] |
+                BB_FILE_ATTACKS[king][BB_FILE_MASKS[king] & occupied]) & rook_to:
+            return True
+
+        # The king move uncovers one of the other sliders.
+        return self._sliders_check(king, occupied, self.occupied_co[self.turn] & ~king_from & ~rook_from)
+
     def was_into_check(self) -> bool:
         """
         Checks if the king of the other side is attacked. Such a position is not
@@ -1890,18 +2322,13 @@ class Board(BaseBoard):
         this does not consider a repetition that can be played on the next
         move.
 
-        Note that checking this can be slow: In the worst case the entire
-        game has to be replayed because there is no incremental transposition
-        table.
+        Positions are first compared by the Zobrist keys recorded on the
+        move stack, only since the last capture or pawn move. A replay of
+        the game is needed only to confirm an actual repetition.
         """
-        # Fast check, based on occupancy only.
-        maybe_repetitions = 1
-        for state in reversed(self._stack):
-            if state.occupied == self.occupied:
-                maybe_repetitions += 1
-                if maybe_repetitions >= count:
-                    break
-        if maybe_repetitions < count:
+        # Fast check, based on Zobrist keys. Equal positions always have
+        # equal keys, so this never misses a repetition.
+        if not self._is_key_repetition(count):
             return False
 
         # Check full replay.
@@ -1930,6 +2357,64 @@ class Board(BaseBoard):
 
         return False
 
+    def _is_key_repetition(self, count: int) -> bool:
+        if count <= 1:
+            return True
+
+        # Positions on the stack are first compared by the piece placement
+        # key (stepping by two plies keeps the turn equal). Castling rights
+        # and the en passant square only need a closer look if they differ.
+        # Null moves do not reset the halfmove clock, but positions before a
+        # null move are not reachable by play, so the scan stops there.
+        zobrist = self._zobrist
+        castling_rights, ep_square = self.castling_rights, self.ep_square
+        stack = self._stack
+        plies = min(self.halfmove_clock, len(stack))
+        move_stack = self.move_stack
+        for i in range(1, plies + 1):
+            if not move_stack[-i]:
+                plies = i - 1
+                break
+        repetitions = 1
+        tail = None
+        for i in range(2, plies + 1, 2):
+            state = stack[-i]
+            if state.zobrist != zobrist:
+                continue
+            if state.castling_rights != castling_rights or state.ep_square != ep_square:
+                if tail is None:
+                    tail = self._repetition_tail(castling_rights, ep_square)
+                if self._repetition_tail(state.castling_rights, state.ep_square) != tail:
+                    continue
+            repetitions += 1
+            if repetitions >= count:
+                return True
+        return False
+
+    def _repetition_tail(self, castling_rights: Bitboard, ep_square: Optional[Square]) -> Tuple[Bitboard, Optional[Square]]:
+        # Clean castling rights and legal en passant square, given raw ones,
+        # for the current piece placement and turn.
+        saved = self.castling_rights, self.ep_square
+        self.castling_rights, self.ep_square = castling_rights, ep_square
+        try:
+            return self._clean_castling_rights(), (ep_square if self.has_legal_en_passant() else None)
+        finally:
+            self.castling_rights, self.ep_square = saved
+
+    def is_key_repetition(self, count: int = 2) -> bool:
+        """
+        Checks if the current position occurred *count* times (counting the
+        current one), by comparing the piece placement keys of positions on
+        the move stack since the last capture, pawn move or null move. Castling rights
+        and en passant squares are compared as in
+        :func:`~chess.Board.is_repetition()`.
+
+        This is meant for search: it takes time proportional to the number of
+        reversible plies and never modifies the board, but it trusts the
+        64-bit keys (unlike :func:`~chess.Board.is_repetition()`).
+        """
+        return self._is_key_repetition(count)
+
     def _board_state(self: BoardT) -> _BoardState[BoardT]:
         return _BoardState(self)
 
@@ -2907,6 +3392,134 @@ class Board(BaseBoard):
         """
         return self.is_zeroing(move) or self._reduces_castling_rights(move)
 
+    def _see_sliders(self, square: Square, occupied: Bitboard) -> Bitboard:
+        # Sliding attackers of a square given an occupancy, used to discover
+        # x-ray attackers behind pieces that already took part in an exchange.
+        return ((BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied] & (self.bishops | self.queens)) |
+                ((BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied] |
+                  BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied]) & (self.rooks | self.queens)))
+
+    def see(self, move: Move) -> int:
+        """
+        Static exchange evaluation of the given pseudo-legal move: the
+        material balance (in :data:`~chess.SEE_VALUES`) after the best
+        sequence of captures on the target square, from the point of view of
+        the side making the move.
+
+        Attackers are always picked least valuable first. X-ray attackers
+        are discovered by removing pieces from the occupancy. Pins are
+        ignored. The board is never modified.
+        """
+        if self.is_castling(move):
+            return 0
+
+        to_square = move.to_square
+        from_bb = BB_SQUARES[move.from_square]
+        occupied = self.occupied ^ from_bb
+
+        if self.is_en_passant(move):
+            victim = PAWN
+            occupied ^= BB_SQUARES[to_square + (-8 if self.turn == WHITE else 8)]
+        else:
+            victim = self.piece_type_at(to_square)
+
+        gain = [SEE_VALUES[victim] if victim else 0]
+        on_square = self.piece_type_at(move.from_square)
+        if move.promotion:
+            gain[0] += SEE_VALUES[move.promotion] - SEE_VALUES[PAWN]
+            on_square = move.promotion
+
+        attackers = (self._attackers_mask(WHITE, to_square, occupied) |
+                     self._attackers_mask(BLACK, to_square, occupied)) & occupied
+        color = not self.turn
+
+        while True:
+            our_attackers = attackers & self.occupied_co[color]
+            if not our_attackers:
+                break
+
+            for piece_type, bb in ((PAWN, self.pawns), (KNIGHT, self.knights), (BISHOP, self.bishops),
+                                   (ROOK, self.rooks), (QUEEN, self.queens), (KING, self.kings)):
+                candidates = our_attackers & bb
+                if candidates:
+                    break
+
+            if piece_type == KING and attackers & self.occupied_co[not color]:
+                # The king cannot capture into a defended square.
+                break
+
+            gain.append(SEE_VALUES[on_square] - gain[-1])
+            occupied ^= candidates & -candidates
+            attackers = (attackers | self._see_sliders(to_square, occupied)) & occupied
+            on_square = piece_type
+            color = not color
+
+        for i in range(len(gain) - 1, 0, -1):
+            gain[i - 1] = -max(-gain[i - 1], gain[i])
+
+        return gain[0]
+
+    def see_ge(self, move: Move, threshold: int = 0) -> bool:
+        """
+        Tests if the :func:`static exchange evaluation <chess.Board.see()>`
+        of the given pseudo-legal move is at least *threshold*.
+
+        Cheaper than computing the exact value, because the exchange is
+        abandoned as soon as the outcome relative to the threshold is known.
+        """
+        if self.is_castling(move) or move.promotion:
+            return self.see(move) >= threshold
+
+        to_square = move.to_square
+        occupied = self.occupied ^ BB_SQUARES[move.from_square]
+
+        if self.is_en_passant(move):
+            victim: Optional[PieceType] = PAWN
+            occupied ^= BB_SQUARES[to_square + (-8 if self.turn == WHITE else 8)]
+        else:
+            victim = self.piece_type_at(to_square)
+
+        swap = (SEE_VALUES[victim] if victim else 0) - threshold
+        if swap < 0:
+            return False
+
+        swap = SEE_VALUES[typing.cast(PieceType, self.piece_type_at(move.from_square))] - swap
+        if swap <= 0:
+            return True
+
+        attackers = (self._attackers_mask(WHITE, to_square, occupied) |
+                     self._attackers_mask(BLACK, to_square, occupied)) & occupied
+        color = self.turn
+        result = True
+
+        while True:
+            color = not color
+            attackers &= occupied
+            our_attackers = attackers & self.occupied_co[color]
+            if not our_attackers:
+                break
+
+            for piece_type, bb in ((PAWN, self.pawns), (KNIGHT, self.knights), (BISHOP, self.bishops),
+                                   (ROOK, self.rooks), (QUEEN, self.queens), (KING, self.kings)):
+                candidates = our_attackers & bb
+                if candidates:
+                    break
+
+            if piece_type == KING:
+                # Capturing with the king only works if the square is no
+                # longer defended.
+                return result if attackers & self.occupied_co[not color] else not result
+
+            result = not result
+            swap = SEE_VALUES[piece_type] - swap
+            if swap < int(result):
+                break
+
+            occupied ^= candidates & -candidates
+            attackers |= self._see_sliders(to_square, occupied)
+
+        return result
+
     def is_castling(self, move: Move) -> bool:
         """Checks if the given pseudo-legal move is a castling move."""
         if self.kings & BB_SQUARES[move.from_square]:
@@ -2936,6 +3549,9 @@ class Board(BaseBoard):
             # they were filtered already.
             return self.castling_rights
 
+        return self._clean_castling_rights()
+
+    def _clean_castling_rights(self) -> Bitboard:
         castling = self.castling_rights & self.rooks
         white_castling = castling & BB_RANK_1 & self.occupied_co[WHITE]
         black_castling = castling & BB_RANK_8 & self.occupied_co[BLACK]
@@ -3357,6 +3973,34 @@ class Board(BaseBoard):
                 self.turn, self.clean_castling_rights(),
                 self.ep_square if self.has_legal_en_passant() else None)
 
+    def zobrist_key(self) -> int:
+        """
+        Gets a 64-bit Zobrist key of the position.
+
+        The piece placement part of the key is maintained incrementally by
+        :func:`~chess.Board.push()` and :func:`~chess.Board.pop()`, so this
+        is a constant time operation. Turn, castling rights and the en passant
+        file are hashed in as well, the latter only if a pawn of the side to
+        move is ready to capture (legality of the capture is irrelevant).
+
+        Rights are hashed as stored, not cleaned, so positions that are equal
+        in the sense of :func:`~chess.Board.is_repetition()` can (rarely)
+        have different keys. Use :func:`~chess.Board.is_key_repetition()`
+        to detect repetitions.
+
+        The key is not compatible with
+        :func:`chess.polyglot.zobrist_hash()`.
+        """
+        key = self._zobrist
+        if self.turn == WHITE:
+            key ^= ZOBRIST_TURN
+        if self.castling_rights:
+            key ^= _zobrist_castling(self.castling_rights)
+        ep_square = self.ep_square
+        if ep_square is not None and BB_PAWN_ATTACKS[not self.turn][ep_square] & self.pawns & self.occupied_co[self.turn]:
+            key ^= ZOBRIST_EP[ep_square & 7]
+        return key
+
     def __repr__(self) -> str:
         if not self.chess960:
             return f"{type(self).__name__}({self.fen()!r})"
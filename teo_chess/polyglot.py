@@ -17,14 +17,22 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 import chess
+import collections
+import contextlib
+import heapq
 import struct
 import os
 import mmap
 import random
+import shutil
+import tempfile
 import typing
 
 from types import TracebackType
-from typing import Callable, Container, Iterator, List, NamedTuple, Optional, Type, Union
+from typing import BinaryIO, Callable, Container, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Type, Union
+
+if typing.TYPE_CHECKING:
+    import numpy as np
 
 
 PathLike = Union[str, bytes, os.PathLike]
@@ -32,6 +40,12 @@ PathLike = Union[str, bytes, os.PathLike]
 
 ENTRY_STRUCT = struct.Struct(">QHHI")
 
+ENTRY_CACHE_SIZE = 256
+
+# Offset of the weight and learn fields within an entry.
+_WEIGHT_LEARN_STRUCT = struct.Struct(">HI")
+_WEIGHT_OFFSET = 10
+
 
 POLYGLOT_RANDOM_ARRAY = [
     0x9D39247E33776D41, 0x2AF7398005AAA5C7, 0x44DB015024623547, 0x9C15F73E62A76AE2,
@@ -238,7 +252,39 @@ class ZobristHasher:
         assert len(array) >= 781
         self.array = array
 
+        # Piece keys indexed by piece_type << 7 | color << 6 | square, the
+        # layout of the incrementally maintained keys of teo_chess boards.
+        self.pieces = [0] * (7 << 7)
+        for piece_type in chess.PIECE_TYPES:
+            for color in chess.COLORS:
+                for square in chess.SQUARES:
+                    self.pieces[piece_type << 7 | color << 6 | square] = array[64 * ((piece_type - 1) * 2 + color) + square]
+
+        self._castling_cache: Dict[Tuple[chess.Bitboard, chess.Bitboard], int] = {}
+
+    def attach(self, board: chess.BaseBoard) -> None:
+        """
+        Attaches the hasher to a board, so that the piece placement part of
+        the hash is updated incrementally as moves are pushed and popped,
+        and hashing the board becomes a constant time operation.
+
+        Requires a board with ``set_zobrist_table()``, i.e. a
+        :class:`teo_chess.Board`.
+        """
+        board.set_zobrist_table(self.pieces)  # type: ignore
+
+    def detach(self, board: chess.BaseBoard) -> None:
+        """Detaches the hasher from a board (if attached)."""
+        if self.is_attached(board):
+            board.set_zobrist_table(None)  # type: ignore
+
+    def is_attached(self, board: chess.BaseBoard) -> bool:
+        return getattr(board, "zobrist_table", None) is self.pieces
+
     def hash_board(self, board: chess.BaseBoard) -> int:
+        if self.is_attached(board):
+            return board.zobrist_table_key()  # type: ignore
+
         zobrist_hash = 0
 
         for pivot, squares in enumerate(board.occupied_co):
@@ -249,6 +295,17 @@ class ZobristHasher:
         return zobrist_hash
 
     def hash_castling(self, board: chess.Board) -> int:
+        if not board.castling_rights:
+            return 0
+
+        # The flags depend only on the clean castling rights and on the
+        # kings on the back ranks.
+        cache_key = (board.clean_castling_rights(), board.kings & chess.BB_BACKRANKS & ~board.promoted)
+        try:
+            return self._castling_cache[cache_key]
+        except KeyError:
+            pass
+
         zobrist_hash = 0
 
         # Hash in the castling flags.
@@ -261,6 +318,7 @@ class ZobristHasher:
         if board.has_queenside_castling_rights(chess.BLACK):
             zobrist_hash ^= self.array[768 + 3]
 
+        self._castling_cache[cache_key] = zobrist_hash
         return zobrist_hash
 
     def hash_ep_square(self, board: chess.Board) -> int:
@@ -287,7 +345,10 @@ class ZobristHasher:
                 self.hash_ep_square(board) ^ self.hash_turn(board))
 
 
-def zobrist_hash(board: chess.Board, *, _hasher: Callable[[chess.Board], int] = ZobristHasher(POLYGLOT_RANDOM_ARRAY)) -> int:
+POLYGLOT_HASHER = ZobristHasher(POLYGLOT_RANDOM_ARRAY)
+
+
+def zobrist_hash(board: chess.Board, *, _hasher: Callable[[chess.Board], int] = POLYGLOT_HASHER) -> int:
     """
     Calculates the Polyglot Zobrist hash of the position.
 
@@ -295,6 +356,10 @@ def zobrist_hash(board: chess.Board, *, _hasher: Callable[[chess.Board], int] =
     an array. Which values are picked is decided by features of the
     position, such as piece positions, castling rights and en passant
     squares.
+
+    If :data:`~chess.polyglot.POLYGLOT_HASHER` is attached to the board
+    (see :func:`~chess.polyglot.ZobristHasher.attach()`), the piece
+    placement part is not recomputed.
     """
     return _hasher(board)
 
@@ -309,6 +374,26 @@ class Entry(NamedTuple):
     move: chess.Move
 
 
+def _decode_entry(key: int, raw_move: int, weight: int, learn: int) -> Entry:
+    # Extract source and target square.
+    to_square = raw_move & 0x3f
+    from_square = (raw_move >> 6) & 0x3f
+
+    # Extract the promotion type.
+    promotion_part = (raw_move >> 12) & 0x7
+    promotion = promotion_part + 1 if promotion_part else None
+
+    # Piece drop.
+    if from_square == to_square:
+        promotion, drop = None, promotion
+    else:
+        drop = None
+
+    # Entry with move (not normalized).
+    move = chess.Move(from_square, to_square, promotion, drop)
+    return Entry(key, raw_move, weight, learn, move)
+
+
 class _EmptyMmap(bytearray):
     def size(self) -> int:
         return 0
@@ -317,14 +402,62 @@ class _EmptyMmap(bytearray):
         pass
 
 
+def learn_update(weight: int, learn: int, result: float) -> Tuple[int, int]:
+    """
+    The default result-driven update rule for book learning. *result* is
+    the outcome of the game for the side that played the move: ``1``,
+    ``0.5`` or ``0``.
+
+    The learn field counts games in its high 16 bits and points (in half
+    points) in its low 16 bits. Both are halved before they would
+    overflow. The weight grows by a quarter (at least 1) after a win and
+    shrinks by a quarter after a loss, but never drops to 0, which would
+    delete the entry.
+    """
+    games, points = learn >> 16, learn & 0xffff
+    if games == 0xffff or points > 0xffff - 2:
+        games, points = games // 2, points // 2
+    games += 1
+    points += round(2 * result)
+
+    if result > 0.5:
+        weight = min(0xffff, weight + max(1, weight // 4))
+    elif result < 0.5:
+        weight = max(1, weight - max(1, weight // 4))
+
+    return weight, games << 16 | points
+
+
 class MemoryMappedReader:
-    """Maps a Polyglot opening book to memory."""
+    """
+    Maps a Polyglot opening book to memory.
+
+    The decoded entries of the last *cache_size* probed positions are kept
+    in an LRU cache, so that repeatedly probing the same (early opening)
+    positions does not search and decode the book again.
+
+    With *writable* the book is mapped read-write, and the weight and learn
+    fields of existing entries can be changed in place with
+    :func:`~chess.polyglot.MemoryMappedReader.update()` and
+    :func:`~chess.polyglot.MemoryMappedReader.learn_game()`. Changes are
+    written back with :func:`~chess.polyglot.MemoryMappedReader.flush()`
+    (msync and fsync), automatically after every *sync_every* updates
+    (``0``: only on flush and close).
+    """
+
+    writable = False
 
-    def __init__(self, filename: PathLike) -> None:
-        self.fd = os.open(filename, os.O_RDONLY | os.O_BINARY if hasattr(os, "O_BINARY") else os.O_RDONLY)
+    def __init__(self, filename: PathLike, *, cache_size: int = ENTRY_CACHE_SIZE, writable: bool = False, sync_every: int = 0) -> None:
+        self._init_cache(cache_size)
+        self.writable = writable
+        self.sync_every = sync_every
+        self.pending = 0
+
+        flags = os.O_RDWR if writable else os.O_RDONLY
+        self.fd = os.open(filename, flags | os.O_BINARY if hasattr(os, "O_BINARY") else flags)
 
         try:
-            self.mmap: Union[mmap.mmap, _EmptyMmap] = mmap.mmap(self.fd, 0, access=mmap.ACCESS_READ)
+            self.mmap: Union[mmap.mmap, _EmptyMmap] = mmap.mmap(self.fd, 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
         except (ValueError, OSError):
             self.mmap = _EmptyMmap()  # Workaround for empty opening books.
 
@@ -337,6 +470,10 @@ class MemoryMappedReader:
         except AttributeError:
             pass
 
+    def _init_cache(self, cache_size: int) -> None:
+        self.cache_size = cache_size
+        self._cache: "collections.OrderedDict[int, List[Entry]]" = collections.OrderedDict()
+
     def __enter__(self) -> "MemoryMappedReader":
         return self
 
@@ -355,23 +492,7 @@ class MemoryMappedReader:
         except struct.error:
             raise IndexError()
 
-        # Extract source and target square.
-        to_square = raw_move & 0x3f
-        from_square = (raw_move >> 6) & 0x3f
-
-        # Extract the promotion type.
-        promotion_part = (raw_move >> 12) & 0x7
-        promotion = promotion_part + 1 if promotion_part else None
-
-        # Piece drop.
-        if from_square == to_square:
-            promotion, drop = None, promotion
-        else:
-            drop = None
-
-        # Entry with move (not normalized).
-        move = chess.Move(from_square, to_square, promotion, drop)
-        return Entry(key, raw_move, weight, learn, move)
+        return _decode_entry(key, raw_move, weight, learn)
 
     def __iter__(self) -> Iterator[Entry]:
         i = 0
@@ -397,25 +518,43 @@ class MemoryMappedReader:
     def __contains__(self, entry: Entry) -> bool:
         return any(current == entry for current in self.find_all(entry.key, minimum_weight=entry.weight))
 
-    def find_all(self, board: Union[chess.Board, int], *, minimum_weight: int = 1, exclude_moves: Container[chess.Move] = ()) -> Iterator[Entry]:
-        """Seeks a specific position and yields corresponding entries."""
+    def _key_entries(self, key: int) -> List[Entry]:
+        # All entries with the given key, decoded (moves not normalized).
+        cache = self._cache
         try:
-            key = int(board)  # type: ignore
-            context: Optional[chess.Board] = None
-        except (TypeError, ValueError):
-            context = typing.cast(chess.Board, board)
-            key = zobrist_hash(context)
+            entries = cache[key]
+            cache.move_to_end(key)
+            return entries
+        except KeyError:
+            pass
 
+        entries = []
         i = self.bisect_key_left(key)
         size = len(self)
-
         while i < size:
             entry = self[i]
-            i += 1
-
             if entry.key != key:
                 break
+            entries.append(entry)
+            i += 1
+
+        if self.cache_size > 0:
+            cache[key] = entries
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+        return entries
+
+    def find_all(self, board: Union[chess.Board, int], *, minimum_weight: int = 1, exclude_moves: Container[chess.Move] = ()) -> Iterator[Entry]:
+        """Seeks a specific position and yields corresponding entries."""
+        try:
+            key = int(board)  # type: ignore
+            context: Optional[chess.Board] = None
+        except (TypeError, ValueError):
+            context = typing.cast(chess.Board, board)
+            key = zobrist_hash(context)
 
+        for entry in self._key_entries(key):
             if entry.weight < minimum_weight:
                 continue
 
@@ -480,22 +619,108 @@ class MemoryMappedReader:
 
         :raises: :exc:`IndexError` if no entries are found.
         """
-        total_weights = sum(entry.weight for entry in self.find_all(board, exclude_moves=exclude_moves))
+        entries = list(self.find_all(board, exclude_moves=exclude_moves))
+        total_weights = sum(entry.weight for entry in entries)
         if not total_weights:
             raise IndexError()
 
         choice = random.randint(0, total_weights - 1)
 
         current_sum = 0
-        for entry in self.find_all(board, exclude_moves=exclude_moves):
+        for entry in entries:
             current_sum += entry.weight
             if current_sum > choice:
                 return entry
 
         assert False
 
+    def _entry_index(self, key: int, raw_move: int) -> int:
+        i = self.bisect_key_left(key)
+        for entry in self._key_entries(key):
+            if entry.raw_move == raw_move:
+                return i
+            i += 1
+        raise IndexError()
+
+    def update(self, entry: Entry, *, weight: Optional[int] = None, learn: Optional[int] = None) -> Entry:
+        """
+        Overwrites the weight and/or learn field of an existing entry (found
+        by key and raw move) in place. Requires a writable book.
+
+        Returns the updated entry.
+
+        :raises: :exc:`IndexError` if the book has no such entry.
+        """
+        if not self.writable:
+            raise ValueError("book is not writable")
+
+        index = self._entry_index(entry.key, entry.raw_move)
+        _, _, old_weight, old_learn = ENTRY_STRUCT.unpack_from(self.mmap, index * ENTRY_STRUCT.size)
+        weight = old_weight if weight is None else weight
+        learn = old_learn if learn is None else learn
+        _WEIGHT_LEARN_STRUCT.pack_into(self.mmap, index * ENTRY_STRUCT.size + _WEIGHT_OFFSET, weight, learn)
+        self._cache.pop(entry.key, None)
+
+        self.pending += 1
+        if self.sync_every and self.pending >= self.sync_every:
+            self.flush()
+
+        return entry._replace(weight=weight, learn=learn)
+
+    def learn(self, board: chess.Board, move: chess.Move, result: float, *, rule: Callable[[int, int, float], Tuple[int, int]] = learn_update) -> Optional[Entry]:
+        """
+        Applies the update *rule* for *move* played in the position of
+        *board*, with *result* (``1``, ``0.5`` or ``0``) from the point of
+        view of the side to move.
+
+        Returns the updated entry, or ``None`` if the move is not in the book.
+        """
+        key = zobrist_hash(board)
+        raw_move = encode_move(board, move)
+        for entry in self._key_entries(key):
+            if entry.raw_move == raw_move:
+                weight, learn = rule(entry.weight, entry.learn, result)
+                return self.update(entry, weight=weight, learn=learn)
+        return None
+
+    def learn_game(self, board: chess.Board, result: Optional[str] = None, *, color: Optional[chess.Color] = None, max_ply: Optional[int] = None, rule: Callable[[int, int, float], Tuple[int, int]] = learn_update) -> List[Entry]:
+        """
+        Learns from the game that led to *board*: every book move in the
+        move stack is updated with the *result* (``1-0``, ``0-1`` or
+        ``1/2-1/2``, by default ``board.result()``) for the side that
+        played it. Only moves of *color* are learned, if given, and only
+        moves within the first *max_ply* plies.
+
+        Returns the updated entries.
+        """
+        result = board.result() if result is None else result
+        try:
+            white_result = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}[result]
+        except KeyError:
+            raise ValueError(f"cannot learn from unfinished game: {result!r}")
+
+        updated = []
+        replay = board.root()
+        moves = board.move_stack if max_ply is None else board.move_stack[:max_ply]
+        for move in moves:
+            if color is None or replay.turn == color:
+                entry = self.learn(replay, move, white_result if replay.turn == chess.WHITE else 1.0 - white_result, rule=rule)
+                if entry is not None:
+                    updated.append(entry)
+            replay.push(move)
+        return updated
+
+    def flush(self) -> None:
+        """Writes pending changes of a writable book back to disk."""
+        if self.writable and self.pending:
+            self.mmap.flush()
+            os.fsync(self.fd)
+        self.pending = 0
+
     def close(self) -> None:
-        """Closes the reader."""
+        """Closes the reader (writing back pending changes)."""
+        self._cache.clear()
+        self.flush()
         self.mmap.close()
 
         try:
@@ -504,7 +729,113 @@ class MemoryMappedReader:
             pass
 
 
-def open_reader(path: PathLike) -> MemoryMappedReader:
+def _entry_dtype() -> "np.dtype":
+    import numpy as np
+    return np.dtype([("key", ">u8"), ("raw_move", ">u2"), ("weight", ">u2"), ("learn", ">u4")])
+
+
+class ArrayReader(MemoryMappedReader):
+    """
+    Loads a Polyglot opening book into memory as a NumPy structured array
+    with big-endian ``key``, ``raw_move``, ``weight`` and ``learn`` fields.
+    Requires :mod:`numpy`.
+
+    Supports the interface of :class:`~chess.polyglot.MemoryMappedReader`
+    and adds vectorized lookups for many positions at once:
+    :func:`~chess.polyglot.ArrayReader.probe_many()` and
+    :func:`~chess.polyglot.ArrayReader.contains_many()`.
+    """
+
+    def __init__(self, filename: PathLike, *, cache_size: int = ENTRY_CACHE_SIZE) -> None:
+        import numpy as np
+
+        self._init_cache(cache_size)
+
+        with open(filename, "rb") as f:
+            data = f.read()
+
+        if len(data) % ENTRY_STRUCT.size != 0:
+            raise IOError(f"invalid file size: ensure {filename!r} is a valid polyglot opening book")
+
+        self.entries = np.frombuffer(data, dtype=_entry_dtype())
+
+        # Native byte order copy of the (sorted) keys for searching.
+        self.keys = self.entries["key"].astype(np.uint64)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, index: int) -> Entry:
+        key, raw_move, weight, learn = self.entries[index].item()
+        return _decode_entry(key, raw_move, weight, learn)
+
+    def bisect_key_left(self, key: int) -> int:
+        import numpy as np
+        return int(np.searchsorted(self.keys, np.uint64(key), side="left"))
+
+    def probe_many(self, keys: "Union[np.ndarray, typing.Sequence[int]]", *, minimum_weight: int = 1) -> "Tuple[np.ndarray, np.ndarray]":
+        """
+        Looks up many Zobrist hashes at once.
+
+        Returns a tuple ``(positions, entries)`` of NumPy arrays, where
+        *entries* are all matching book entries (a structured array like
+        :attr:`~chess.polyglot.ArrayReader.entries`) and ``positions[i]``
+        is the index in *keys* of the hash that ``entries[i]`` belongs to.
+        Entries are grouped by position in the order of *keys*.
+        """
+        import numpy as np
+
+        keys = np.asarray(keys, dtype=np.uint64)
+        lo = np.searchsorted(self.keys, keys, side="left")
+        hi = np.searchsorted(self.keys, keys, side="right")
+        counts = hi - lo
+
+        positions = np.repeat(np.arange(len(keys)), counts)
+        offsets = np.arange(len(positions)) - np.repeat(np.cumsum(counts) - counts, counts)
+        entries = self.entries[np.repeat(lo, counts) + offsets]
+
+        if minimum_weight > 0:
+            selected = entries["weight"] >= minimum_weight
+            positions, entries = positions[selected], entries[selected]
+
+        return positions, entries
+
+    def contains_many(self, keys: "Union[np.ndarray, typing.Sequence[int]]", *, minimum_weight: int = 1) -> "np.ndarray":
+        """
+        Checks which of many Zobrist hashes have entries in the book.
+        Returns a boolean NumPy array with one element per hash.
+        """
+        import numpy as np
+
+        keys = np.asarray(keys, dtype=np.uint64)
+        if minimum_weight <= 0:
+            return np.searchsorted(self.keys, keys, side="right") > np.searchsorted(self.keys, keys, side="left")
+
+        found = np.zeros(len(keys), dtype=bool)
+        found[self.probe_many(keys, minimum_weight=minimum_weight)[0]] = True
+        return found
+
+    def close(self) -> None:
+        """Releases the book."""
+        self._cache.clear()
+        self.entries = self.entries[:0]
+        self.keys = self.keys[:0]
+
+
+def open_array_reader(path: PathLike, *, cache_size: int = ENTRY_CACHE_SIZE) -> ArrayReader:
+    """
+    Loads the book at the given path into a NumPy array. See
+    :class:`~chess.polyglot.ArrayReader`.
+
+    >>> import chess.polyglot
+    >>>
+    >>> with chess.polyglot.open_array_reader("data/polyglot/performance.bin") as reader:
+    ...     positions, entries = reader.probe_many(keys)
+    """
+    return ArrayReader(path, cache_size=cache_size)
+
+
+def open_reader(path: PathLike, *, cache_size: int = ENTRY_CACHE_SIZE, writable: bool = False, sync_every: int = 0) -> MemoryMappedReader:
     """
     Creates a reader for the file at the given path.
 
@@ -523,4 +854,229 @@ def open_reader(path: PathLike) -> MemoryMappedReader:
     d2d4 1 0
     c2c4 1 0
     """
-    return MemoryMappedReader(path)
+    return MemoryMappedReader(path, cache_size=cache_size, writable=writable, sync_every=sync_every)
+
+
+WRITER_BUFFER_SIZE = 1 << 18
+
+MERGE_FAN_IN = 128
+
+_READ_CHUNK_ENTRIES = 4096
+
+_RawEntry = Tuple[int, int, int, int]
+
+
+def encode_move(board: chess.Board, move: chess.Move) -> int:
+    """
+    Encodes a move in the given position as the raw 16-bit Polyglot move
+    (castling as king captures rook).
+    """
+    if move.drop:
+        return move.to_square | move.to_square << 6 | (move.drop - 1) << 12
+
+    if not board.chess960:
+        move = board._to_chess960(move)
+    promotion_part = move.promotion - 1 if move.promotion else 0
+    return move.to_square | move.from_square << 6 | promotion_part << 12
+
+
+def _read_entries(f: BinaryIO, name: object = None) -> Iterator[_RawEntry]:
+    # Streams the raw entries of a sorted book or run file in chunks.
+    last_key = 0
+    while True:
+        data = f.read(ENTRY_STRUCT.size * _READ_CHUNK_ENTRIES)
+        if not data:
+            return
+        if len(data) % ENTRY_STRUCT.size != 0:
+            raise IOError(f"invalid file size: ensure {name!r} is a valid polyglot opening book")
+        for entry in ENTRY_STRUCT.iter_unpack(data):
+            if entry[0] < last_key:
+                raise IOError(f"entries not sorted by key: ensure {name!r} is a valid polyglot opening book")
+            last_key = entry[0]
+            yield entry
+
+
+def _write_merged(f: BinaryIO, sources: Iterable[Iterator[_RawEntry]]) -> int:
+    # k-way merge of key-sorted entry streams. Weights of entries with the
+    # same key and move are summed (saturating), learn values are combined
+    # with max(). Within a key, entries are written by descending weight.
+    count = 0
+    group: Dict[int, List[int]] = {}
+    group_key = None
+
+    def flush() -> int:
+        entries = sorted(group.items(), key=lambda item: (-item[1][0], item[0]))
+        for raw_move, (weight, learn) in entries:
+            f.write(ENTRY_STRUCT.pack(group_key, raw_move, min(weight, 0xffff), learn))
+        return len(entries)
+
+    for key, raw_move, weight, learn in heapq.merge(*sources, key=lambda entry: entry[0]):
+        if key != group_key:
+            if group:
+                count += flush()
+                group.clear()
+            group_key = key
+        current = group.get(raw_move)
+        if current is None:
+            group[raw_move] = [weight, learn]
+        else:
+            current[0] += weight
+            current[1] = max(current[1], learn)
+
+    if group:
+        count += flush()
+    return count
+
+
+def _merge_files(f: BinaryIO, paths: List[str], extra: Iterable[Iterator[_RawEntry]] = ()) -> int:
+    with contextlib.ExitStack() as stack:
+        files = [stack.enter_context(open(path, "rb")) for path in paths]
+        return _write_merged(f, [_read_entries(file, path) for file, path in zip(files, paths)] + list(extra))
+
+
+def _reduce_runs(paths: List[str], tmpdir: str, fan_in: int, *, owned: bool = True) -> List[str]:
+    # Merges groups of at most fan_in files into intermediate runs in tmpdir
+    # until at most fan_in files remain, so that no merge holds more than
+    # fan_in files open. Merged runs are removed if owned.
+    if fan_in < 2:
+        raise ValueError(f"merge fan-in must be at least 2, got {fan_in}")
+    while len(paths) > fan_in:
+        merged = []
+        for i in range(0, len(paths), fan_in):
+            group = paths[i:i + fan_in]
+            if len(group) == 1:
+                merged.append(group[0])
+                continue
+            fd, run = tempfile.mkstemp(suffix=".run", dir=tmpdir)
+            with open(fd, "wb") as f:
+                _merge_files(f, group)
+            if owned:
+                for path in group:
+                    os.remove(path)
+            merged.append(run)
+        paths = merged
+        owned = True
+    return paths
+
+
+class BookWriter:
+    """
+    Builds a Polyglot opening book from a stream of ``(board, move, weight)``
+    with bounded memory.
+
+    Entries are aggregated in memory until *buffer_size* distinct
+    key/move pairs are buffered. Then they are sorted and spilled as a run
+    of packed records to a temporary directory (in *tmpdir*). On
+    :func:`~chess.polyglot.BookWriter.close()` the runs are merged into a
+    valid book at *path*, summing the weights of duplicate key/move pairs
+    (capped at 65535). At most *fan_in* runs are open at once: if there are
+    more, they are first merged in passes into intermediate runs.
+
+    >>> import chess.polyglot
+    >>>
+    >>> with chess.polyglot.BookWriter("my.bin") as writer:
+    ...     for board, move in positions:
+    ...         writer.add(board, move)
+    """
+
+    def __init__(self, path: PathLike, *, buffer_size: int = WRITER_BUFFER_SIZE, tmpdir: Optional[PathLike] = None, fan_in: int = MERGE_FAN_IN) -> None:
+        self.path = path
+        self.buffer_size = max(1, buffer_size)
+        self.tmpdir = tmpdir
+        # The final merge also reads the buffered entries, so runs are
+        # reduced to fan_in - 1 and that must still merge at least two.
+        self.fan_in = max(3, fan_in)
+        self.runs: List[str] = []
+        self._rundir: Optional[str] = None
+        # (key << 16 | raw_move) -> weight, and learn values where non-zero.
+        self._weights: Dict[int, int] = {}
+        self._learn: Dict[int, int] = {}
+        self.closed = False
+
+    def __enter__(self) -> "BookWriter":
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc_value: Optional[BaseException], traceback: Optional[TracebackType]) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def add(self, board: chess.Board, move: chess.Move, weight: int = 1, learn: int = 0) -> None:
+        """Adds *weight* to the entry for *move* in the position of *board*."""
+        self.add_raw(zobrist_hash(board), encode_move(board, move), weight, learn)
+
+    def add_raw(self, key: int, raw_move: int, weight: int = 1, learn: int = 0) -> None:
+        """Adds an entry given the Zobrist hash and the raw Polyglot move."""
+        if self.closed:
+            raise ValueError("book writer is closed")
+        index = key << 16 | raw_move
+        self._weights[index] = self._weights.get(index, 0) + weight
+        if learn:
+            self._learn[index] = max(self._learn.get(index, 0), learn)
+        if len(self._weights) >= self.buffer_size:
+            self._spill()
+
+    def _buffered(self) -> Iterator[_RawEntry]:
+        learn = self._learn
+        for index in sorted(self._weights):
+            yield index >> 16, index & 0xffff, min(self._weights[index], 0xffff), learn.get(index, 0)
+
+    def _spill(self) -> None:
+        if self._rundir is None:
+            self._rundir = tempfile.mkdtemp(prefix="polyglot-", dir=self.tmpdir)
+        fd, run = tempfile.mkstemp(suffix=".run", dir=self._rundir)
+        pack = ENTRY_STRUCT.pack
+        with open(fd, "wb") as f:
+            f.write(b"".join(pack(*entry) for entry in self._buffered()))
+        self.runs.append(run)
+        self._weights.clear()
+        self._learn.clear()
+
+    def close(self) -> int:
+        """
+        Merges the buffered entries and all spilled runs into the book.
+        Returns the number of entries written.
+        """
+        if self.closed:
+            return 0
+        try:
+            if self._rundir is not None:
+                # One slot of the final merge is taken by the buffered entries.
+                self.runs = _reduce_runs(self.runs, self._rundir, self.fan_in - 1)
+            with open(self.path, "wb") as f:
+                return _merge_files(f, self.runs, [self._buffered()])
+        finally:
+            self.discard()
+
+    def discard(self) -> None:
+        """Drops all buffered entries and runs without writing the book."""
+        if self._rundir is not None:
+            shutil.rmtree(self._rundir, ignore_errors=True)
+            self._rundir = None
+        self.runs.clear()
+        self._weights.clear()
+        self._learn.clear()
+        self.closed = True
+
+
+def merge_books(path: PathLike, *books: PathLike, tmpdir: Optional[PathLike] = None, fan_in: int = MERGE_FAN_IN) -> int:
+    """
+    Merges the Polyglot books *books* into a new book at *path*, summing
+    the weights of entries with the same key and move (capped at 65535).
+    The input books are streamed, so memory use is bounded. At most
+    *fan_in* books are open at once: if there are more, they are first
+    merged in passes into intermediate runs (in *tmpdir*).
+
+    Returns the number of entries written.
+    """
+    paths = [os.fspath(book) for book in books]
+    fan_in = max(2, fan_in)
+    if len(paths) <= fan_in:
+        with open(path, "wb") as f:
+            return _merge_files(f, paths)
+
+    with tempfile.TemporaryDirectory(prefix="polyglot-", dir=tmpdir) as rundir:
+        paths = _reduce_runs(paths, rundir, fan_in, owned=False)
+        with open(path, "wb") as f:
+            return _merge_files(f, paths)
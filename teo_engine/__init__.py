@@ -0,0 +1,10 @@
+"""
+Punctele de intrare ale motorului TEO.
+
+    python -m teo_engine uci                 # protocolul UCI pe stdin/stdout
+    python -m teo_engine bench [depth] [threads]
+"""
+
+from teo_engine.uci import UciEngine
+
+__all__ = ["UciEngine"]
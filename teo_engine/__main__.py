@@ -0,0 +1,21 @@
+import sys
+
+import engine
+from teo_engine.uci import UciEngine
+
+
+def main(argv: list) -> int:
+    command = argv[0] if argv else "uci"
+    if command == "uci":
+        UciEngine().run()
+    elif command == "bench":
+        # python -m teo_engine bench [depth] [threads]
+        engine.bench(*(int(arg) for arg in argv[1:3]))
+    else:
+        print("usage: python -m teo_engine [uci | bench [depth] [threads]]", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,276 @@
+"""
+Front-end UCI pentru motorul TEO.
+
+Comenzile sunt citite pe thread-ul principal; căutarea rulează pe un thread
+separat, deci `stop`, `isready` și `quit` primesc răspuns imediat. După
+fiecare iterație completă se trimite o linie `info`, iar la final `bestmove`.
+"""
+
+import sys
+import threading
+from typing import Callable, Dict, IO, List, Optional, Tuple
+
+import engine
+import teo_chess
+
+NAME   = "TEO"
+AUTHOR = "TEO"
+
+MAX_DEPTH    = 64
+HASH_MIN_MB  = 1
+HASH_MAX_MB  = 4096
+THREADS_MAX  = 64
+
+# cuvintele cheie ale lui `go`; cele cu valoare sunt urmate de un număr
+GO_VALUES = {"wtime", "btime", "winc", "binc", "movestogo", "depth", "nodes", "movetime", "mate"}
+GO_FLAGS  = {"infinite", "ponder"}
+
+
+def format_score(score: int) -> str:
+    """Scorul în formatul UCI: `cp <centipioni>` sau `mate <mutări>`."""
+    if score >= engine.MATE_BOUND:
+        return f"mate {(engine.MATE - score + 1) // 2}"
+    if score <= -engine.MATE_BOUND:
+        return f"mate {-((engine.MATE + score) // 2)}"
+    return f"cp {score}"
+
+
+def format_info(info: engine.SearchInfo) -> str:
+    pv = " ".join(mv.uci() for mv in info.pv)
+    return (f"info depth {info.depth} score {format_score(info.score)} nodes {info.nodes}"
+            f" nps {info.nps} hashfull {info.hashfull} time {int(info.time * 1000)} pv {pv}")
+
+
+def parse_go(args: List[str], turn: teo_chess.Color) -> Tuple[engine.Limits, bool]:
+    """
+    Transformă argumentele lui `go` în Limits. Al doilea element e True dacă
+    `bestmove` trebuie amânat până la `stop` (`go infinite`, `go ponder` sau
+    `go` fără nicio limită).
+    """
+    values: Dict[str, int] = {}
+    flags = set()
+    i = 0
+    while i < len(args):
+        token = args[i]
+        if token in GO_VALUES:
+            values[token] = int(args[i + 1])
+            i += 2
+        else:
+            # `searchmoves` și cuvintele necunoscute sunt ignorate
+            if token in GO_FLAGS:
+                flags.add(token)
+            i += 1
+
+    defaults = engine.Limits._field_defaults
+    clock, inc = ("wtime", "winc") if turn == teo_chess.WHITE else ("btime", "binc")
+    limits = engine.Limits(
+        time_left   = values[clock] / 1000 if clock in values else defaults["time_left"],
+        increment   = values.get(inc, 0) / 1000,
+        moves_to_go = values.get("movestogo", defaults["moves_to_go"]),
+        depth       = min(values.get("depth", MAX_DEPTH), MAX_DEPTH),
+        nodes       = values.get("nodes"),
+        movetime    = values["movetime"] / 1000 if "movetime" in values else None,
+    )
+    if "mate" in values and "depth" not in values:
+        limits = limits._replace(depth=min(2 * values["mate"] - 1, MAX_DEPTH))
+
+    bounded = clock in values or values.keys() & {"depth", "nodes", "movetime", "mate"}
+    return limits, bool(flags) or not bounded
+
+
+def parse_position(args: List[str]) -> teo_chess.Board:
+    if not args:
+        raise ValueError("position: expected 'startpos' or 'fen'")
+    if "moves" in args:
+        split = args.index("moves")
+        setup, moves = args[:split], args[split + 1:]
+    else:
+        setup, moves = args, []
+
+    if setup[0] == "startpos":
+        board = teo_chess.Board()
+    elif setup[0] == "fen":
+        board = teo_chess.Board(" ".join(setup[1:]))
+    else:
+        raise ValueError(f"position: unexpected {setup[0]!r}")
+
+    for uci in moves:
+        board.push_uci(uci)
+    return board
+
+
+class UciEngine:
+    """Bucla UCI peste un Searcher (TT-ul și heuristicile rămân calde între mutări)."""
+
+    def __init__(self, stdin: Optional[IO[str]] = None, stdout: Optional[IO[str]] = None) -> None:
+        self.stdin  = stdin if stdin is not None else sys.stdin
+        self.stdout = stdout if stdout is not None else sys.stdout
+        self.searcher = engine.Searcher()
+        self.board = teo_chess.Board()
+        self.book_path = engine.BOOK_PATH
+        self.book: Optional[engine.OpeningBook] = None     # OwnBook dezactivat
+        self.book_learning = False
+        # culoarea motorului în partida curentă (din ultimul `go`), pentru BookLearning
+        self.engine_color: Optional[teo_chess.Color] = None
+        self.worker: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.output_lock = threading.Lock()
+        self.commands: Dict[str, Callable[[List[str]], None]] = {
+            "uci":        self.uci,
+            "isready":    self.isready,
+            "ucinewgame": self.ucinewgame,
+            "position":   self.position,
+            "go":         self.go,
+            "stop":       self.stop,
+            "ponderhit":  self.ponderhit,
+            "setoption":  self.setoption,
+        }
+
+    def send(self, line: str) -> None:
+        with self.output_lock:
+            self.stdout.write(line + "\n")
+            self.stdout.flush()
+
+    def run(self) -> None:
+        try:
+            for line in self.stdin:
+                if not self.handle(line):
+                    break
+        finally:
+            self.stop_search()
+            self.learn_game()
+            self.searcher.close()
+
+    def handle(self, line: str) -> bool:
+        """Execută o comandă; întoarce False la `quit`."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "quit":
+            return False
+        handler = self.commands.get(command)
+        if handler is None:
+            # `debug`, `register` etc. nu au efect
+            return True
+        try:
+            handler(args)
+        except (ValueError, IndexError) as err:
+            self.send(f"info string {command}: {err}")
+        return True
+
+    # ── comenzi ──
+
+    def uci(self, args: List[str]) -> None:
+        self.send(f"id name {NAME}")
+        self.send(f"id author {AUTHOR}")
+        self.send(f"option name Hash type spin default {engine.TT_MB} min {HASH_MIN_MB} max {HASH_MAX_MB}")
+        self.send(f"option name Threads type spin default 1 min 1 max {THREADS_MAX}")
+        self.send("option name OwnBook type check default false")
+        self.send(f"option name BookFile type string default {engine.BOOK_PATH}")
+        self.send("option name BookLearning type check default false")
+        self.send("uciok")
+
+    def isready(self, args: List[str]) -> None:
+        self.send("readyok")
+
+    def ucinewgame(self, args: List[str]) -> None:
+        self.stop_search()
+        self.learn_game()
+        self.searcher.reset()
+        self.board = teo_chess.Board()
+
+    def position(self, args: List[str]) -> None:
+        self.stop_search()
+        self.board = parse_position(args)
+
+    def go(self, args: List[str]) -> None:
+        self.stop_search()
+        limits, wait_for_stop = parse_go(args, self.board.turn)
+        self.engine_color = self.board.turn
+        if self.book is not None and not wait_for_stop:
+            mv = self.book.weighted_choice(self.board)
+            if mv is not None:
+                self.send(f"bestmove {mv.uci()}")
+                return
+        self.stop_event = threading.Event()
+        self.worker = threading.Thread(target=self._search,
+                                       args=(self.board.copy(), limits, wait_for_stop, self.stop_event),
+                                       name="uci-search", daemon=True)
+        self.worker.start()
+
+    def stop(self, args: List[str]) -> None:
+        self.stop_search()
+
+    def ponderhit(self, args: List[str]) -> None:
+        # nu anunțăm opțiunea Ponder; `go ponder` se comportă ca `go infinite`
+        pass
+
+    def setoption(self, args: List[str]) -> None:
+        if "name" not in args:
+            raise ValueError("expected 'name'")
+        start = args.index("name") + 1
+        if "value" in args:
+            split = args.index("value")
+            name, value = " ".join(args[start:split]), " ".join(args[split + 1:])
+        else:
+            name, value = " ".join(args[start:]), ""
+
+        self.stop_search()
+        if name.lower() == "hash":
+            self.searcher.resize_tt(max(HASH_MIN_MB, min(HASH_MAX_MB, int(value))))
+        elif name.lower() == "threads":
+            self.searcher.set_threads(max(1, min(THREADS_MAX, int(value))))
+        elif name.lower() == "ownbook":
+            self.book = engine.OpeningBook(self.book_path) if value.lower() == "true" else None
+        elif name.lower() == "booklearning":
+            self.book_learning = value.lower() == "true"
+        elif name.lower() == "bookfile":
+            self.book_path = value
+            if self.book is not None:
+                self.book = engine.OpeningBook(value)
+        else:
+            self.send(f"info string unknown option {name!r}")
+
+    def learn_game(self) -> None:
+        """
+        Cu OwnBook și BookLearning, învață din ultima poziție primită dacă
+        partida s-a terminat pe tablă (mat, pat, material insuficient...).
+        Rezultatele adjudecate de GUI (abandon, timp) nu ajung prin UCI.
+        """
+        if self.book is not None and self.book_learning and self.engine_color is not None:
+            updated = engine.learn_from_game(self.board, self.engine_color, self.book)
+            if updated:
+                self.send(f"info string book learning: {updated} entries updated")
+        self.engine_color = None
+
+    # ── căutare ──
+
+    def stop_search(self) -> None:
+        """Oprește căutarea curentă (dacă există) și așteaptă `bestmove`."""
+        if self.worker is not None:
+            self.stop_event.set()
+            self.worker.join()
+            self.worker = None
+
+    def _search(self, board: teo_chess.Board, limits: engine.Limits,
+                wait_for_stop: bool, stop_event: threading.Event) -> None:
+        try:
+            best_mv, _ = self.searcher.search(board, limits, stop_event,
+                                              info=lambda info: self.send(format_info(info)))
+        except Exception as err:
+            self.send(f"info string search failed: {err!r}")
+            best_mv = None
+
+        # UCI: după `go infinite` bestmove se trimite doar la `stop`
+        if wait_for_stop:
+            stop_event.wait()
+
+        if best_mv is None:
+            self.send("bestmove 0000")
+            return
+        info = self.searcher.last_info
+        if info is not None and len(info.pv) > 1 and info.pv[0] == best_mv:
+            self.send(f"bestmove {best_mv.uci()} ponder {info.pv[1].uci()}")
+        else:
+            self.send(f"bestmove {best_mv.uci()}")